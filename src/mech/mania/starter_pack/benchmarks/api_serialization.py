@@ -0,0 +1,76 @@
+"""
+Measures the per-request cost of encoding an API request with a large GameState: copying the game state into
+every request (the original approach) against splicing in a game state encoded once per turn.
+
+Usage: PYTHONPATH=src python src/mech/mania/starter_pack/benchmarks/api_serialization.py [--boards 20] [--size 50]
+"""
+import argparse
+import time
+
+from mech.mania.engine.domain.model import api_pb2
+from mech.mania.starter_pack.benchmarks.game_state_generator import generate_game_state
+from mech.mania.starter_pack.domain.api import API
+from mech.mania.starter_pack.domain.model.characters.position import Position
+from mech.mania.starter_pack.domain.model.game_state import GameState
+
+
+def build_request(api, pos):
+    payload = api_pb2.APIInRangeOfAttackRequest()
+    payload.position.CopyFrom(pos.build_proto_class())
+    payload.player_name = api.player_name
+    return payload
+
+
+def copy_and_serialize(api, pos):
+    payload = build_request(api, pos)
+    payload.gameState.CopyFrom(api.game_state)
+    return payload.SerializeToString()
+
+
+def splice_and_serialize(api, pos):
+    return api.serialize(build_request(api, pos))
+
+
+def time_per_call(func, api, pos, calls):
+    begin = time.perf_counter()
+    for _ in range(calls):
+        data = func(api, pos)
+    return (time.perf_counter() - begin) / calls, data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--boards", type=int, default=20)
+    parser.add_argument("--size", type=int, default=50)
+    parser.add_argument("--players-per-board", type=int, default=2)
+    parser.add_argument("--calls", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=26)
+    args = parser.parse_args()
+
+    game_state = generate_game_state(seed=args.seed, boards=args.boards, width=args.size, height=args.size,
+                                     players_per_board=args.players_per_board)
+    api = API(GameState(game_state), "pvp_player0")
+    pos = Position.create(1, 1, "pvp")
+
+    begin = time.perf_counter()
+    api.get_encoded_game_state()
+    encode_once = time.perf_counter() - begin
+
+    before, old_bytes = time_per_call(copy_and_serialize, api, pos, args.calls)
+    after, new_bytes = time_per_call(splice_and_serialize, api, pos, args.calls)
+
+    # Both encodings must parse to the same request
+    old_request = api_pb2.APIInRangeOfAttackRequest()
+    old_request.ParseFromString(old_bytes)
+    new_request = api_pb2.APIInRangeOfAttackRequest()
+    new_request.ParseFromString(new_bytes)
+    assert old_request == new_request
+
+    print(f"game state size:        {len(api.get_encoded_game_state()) / 1024:10.1f} KiB")
+    print(f"one-time encode:        {encode_once * 1e3:10.3f} ms")
+    print(f"copy + serialize:       {before * 1e3:10.3f} ms per request")
+    print(f"pre-encoded splice:     {after * 1e3:10.3f} ms per request ({before / after:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Measures what the game server spends on a /server request before and after the strategy runs: reading the body,
+parsing the PlayerTurn, wrapping it in a GameState and answering, through the Flask route (before) against
+LeanDecisionEndpoint (after, game_server.py --lean). Both WSGI apps are called in-process, so the network and
+make_decision, which cost the same either way, are left out. The handling columns leave out parsing too, timing
+only what the two paths do differently.
+
+Usage: PYTHONPATH=src python src/mech/mania/starter_pack/benchmarks/decision_endpoint.py [--sizes 25 50 100]
+"""
+import argparse
+import io
+import time
+
+from flask import Flask, request
+from mech.mania.engine.domain.model import character_pb2
+from mech.mania.engine.domain.model import player_pb2
+from mech.mania.starter_pack.benchmarks.game_state_generator import generate_game_state
+from mech.mania.starter_pack.domain.model.game_state import GameState
+from mech.mania.starter_pack.entrypoints.lean_decision import LeanDecisionEndpoint
+
+RESPONSE = character_pb2.CharacterDecision(decision_type=character_pb2.NONE, index=-1).SerializeToString()
+
+
+def answer_turn(payload, player_turn, received=None):
+    player_turn.ParseFromString(payload)
+    GameState(player_turn.game_state)
+    return RESPONSE
+
+
+def skip_turn(payload, player_turn, received=None):
+    return RESPONSE
+
+
+def create_app(answer):
+    app = Flask(__name__)
+
+    @app.route('/server', methods=['POST'])
+    def send_decision():
+        return answer(request.get_data(), player_pb2.PlayerTurn())
+
+    return app
+
+
+def call(app, payload):
+    environ = {
+        "REQUEST_METHOD": "POST",
+        "PATH_INFO": "/server",
+        "SCRIPT_NAME": "",
+        "QUERY_STRING": "",
+        "SERVER_NAME": "127.0.0.1",
+        "SERVER_PORT": "8080",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "CONTENT_TYPE": "application/octet-stream",
+        "CONTENT_LENGTH": str(len(payload)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(payload),
+        "wsgi.errors": io.StringIO(),
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    statuses = []
+    body = b"".join(app(environ, lambda status, headers, exc_info=None: statuses.append(status)))
+    assert statuses == ["200 OK"] and body == RESPONSE, (statuses, body)
+
+
+def time_per_request(app, payload, requests):
+    call(app, payload)
+    begin = time.perf_counter()
+    for _ in range(requests):
+        call(app, payload)
+    return (time.perf_counter() - begin) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25, 50, 100], help="board widths and heights")
+    parser.add_argument("--boards", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=26)
+    args = parser.parse_args()
+
+    apps = {}
+    for name, answer in (("turn", answer_turn), ("handling", skip_turn)):
+        flask_app = create_app(answer)
+        apps[name] = (flask_app, LeanDecisionEndpoint(flask_app.wsgi_app, answer))
+
+    print(f"{'size':<8}{'payload KB':>12}" + "".join(f"{name + ' ' + column:>20}" for name in apps
+                                                  for column in ("flask ms", "lean ms", "speedup")))
+    for size in args.sizes:
+        player_turn = player_pb2.PlayerTurn()
+        player_turn.game_state.CopyFrom(generate_game_state(seed=args.seed, boards=args.boards, width=size,
+                                                            height=size))
+        player_turn.player_name = "pvp_player0"
+        payload = player_turn.SerializeToString()
+
+        line = f"{size:<8}{len(payload) / 1024:12.1f}"
+        for flask_app, lean_app in apps.values():
+            before = time_per_request(flask_app, payload, args.requests)
+            after = time_per_request(lean_app, payload, args.requests)
+            line += f"{before * 1e3:20.3f}{after * 1e3:20.3f}{before / after:19.2f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
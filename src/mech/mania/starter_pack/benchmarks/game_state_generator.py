@@ -0,0 +1,137 @@
+"""
+Builds synthetic game_pb2.GameState messages for benchmarks. The same arguments and seed always produce the same
+game state.
+"""
+import random
+
+from mech.mania.engine.domain.model import board_pb2
+from mech.mania.engine.domain.model import game_pb2
+
+WEARABLES = ("hat", "clothes", "shoes", "accessory")
+
+
+def generate_game_state(seed=26, boards=1, width=50, height=50, impassable_density=0.2, portals=2,
+                        players_per_board=4, monsters_per_board=10, items_per_tile=0.05, inventory_size=4,
+                        state_id=1):
+    """
+    @param boards: Number of boards; the first one is "pvp", the others "board1", "board2", ...
+    @param impassable_density: Fraction of the tiles that are IMPASSIBLE
+    @param portals: Number of portals on each board
+    @param items_per_tile: Average number of items lying on a walkable tile (may be above 1)
+    @param inventory_size: Number of items in each player's inventory
+    @return A game_pb2.GameState; players are named "<board id>_player<i>" and monsters "<board id>_monster<i>"
+    """
+    rnd = random.Random(seed)
+    game_state = game_pb2.GameState()
+    game_state.state_id = state_id
+
+    for b in range(boards):
+        board_id = "pvp" if b == 0 else f"board{b}"
+        walkable = generate_board(rnd, game_state.board_names[board_id], board_id, width, height,
+                                  impassable_density, portals, items_per_tile)
+
+        for i in range(players_per_board):
+            player = game_state.player_names[f"{board_id}_player{i}"]
+            generate_character(rnd, player.character, f"{board_id}_player{i}", board_id, rnd.choice(walkable))
+            for slot in WEARABLES:
+                generate_stats(rnd, getattr(player, slot).stats)
+            for _ in range(inventory_size):
+                generate_item(rnd, player.inventory.add())
+
+        for i in range(monsters_per_board):
+            monster = game_state.monster_names[f"{board_id}_monster{i}"]
+            generate_character(rnd, monster.character, f"{board_id}_monster{i}", board_id, rnd.choice(walkable))
+            monster.aggro_range = rnd.randint(0, 5)
+            for _ in range(rnd.randint(0, 2)):
+                generate_item(rnd, monster.drops.add())
+
+    return game_state
+
+
+def generate_board(rnd, board, board_id, width, height, impassable_density, portals, items_per_tile):
+    """
+    Fills in a board_pb2.Board
+
+    @return The (x, y) of every walkable tile that is not a portal
+    """
+    board.width = width
+    board.height = height
+
+    walkable = []
+    for x in range(width):
+        for y in range(height):
+            tile = board.grid.add()
+            tile.ground_sprite = "grass"
+            if rnd.random() < impassable_density:
+                tile.tile_type = board_pb2.Tile.TileType.IMPASSIBLE
+            else:
+                tile.tile_type = board_pb2.Tile.TileType.BLANK
+                walkable.append((x, y))
+
+    # Grid index is x * height + y
+    for x, y in rnd.sample(walkable, min(portals, len(walkable))):
+        board.grid[x * height + y].tile_type = board_pb2.Tile.TileType.PORTAL
+        portal = board.portals.add()
+        portal.board_id = board_id
+        portal.x = x
+        portal.y = y
+        walkable.remove((x, y))
+
+    whole, fraction = int(items_per_tile), items_per_tile - int(items_per_tile)
+    for x, y in walkable:
+        for _ in range(whole + (1 if rnd.random() < fraction else 0)):
+            generate_item(rnd, board.grid[x * height + y].items.add())
+
+    if not walkable:
+        walkable.append((0, 0))
+    return walkable
+
+
+def generate_character(rnd, character, name, board_id, xy):
+    character.name = name
+    character.level = rnd.randint(1, 10)
+    character.experience = rnd.randint(0, 100 * character.level)
+    character.base_max_health = rnd.randint(10, 100)
+    character.current_health = rnd.randint(1, character.base_max_health)
+    character.base_speed = rnd.randint(1, 5)
+    character.base_attack = rnd.randint(1, 20)
+    character.base_defense = rnd.randint(0, 10)
+    character.position.board_id = board_id
+    character.position.x, character.position.y = xy
+    character.spawn_point.CopyFrom(character.position)
+    character.weapon.range = rnd.randint(1, 3)
+    character.weapon.splash_radius = rnd.randint(0, 1)
+    character.weapon.attack = rnd.randint(1, 20)
+    generate_stats(rnd, character.weapon.stats)
+
+
+def generate_stats(rnd, stats):
+    stats.flat_speed_change = rnd.randint(0, 2)
+    stats.flat_health_change = rnd.randint(0, 20)
+    stats.flat_experience_change = rnd.randint(0, 10)
+    stats.flat_attack_change = rnd.randint(0, 10)
+    stats.flat_defense_change = rnd.randint(0, 10)
+    stats.flat_regen_per_turn = rnd.randint(0, 3)
+    stats.percent_attack_change = round(rnd.random() * 0.5, 2)
+
+
+def generate_item(rnd, item):
+    """
+    Fills in an item_pb2.Item with a random kind of item
+    """
+    kind = rnd.choice(WEARABLES + ("weapon", "consumable"))
+    if kind == "weapon":
+        item.weapon.max_stack = 1
+        item.weapon.range = rnd.randint(1, 3)
+        item.weapon.splash_radius = rnd.randint(0, 1)
+        item.weapon.attack = rnd.randint(1, 20)
+        generate_stats(rnd, item.weapon.stats)
+    elif kind == "consumable":
+        item.consumable.max_stack = 5
+        item.consumable.stacks = rnd.randint(1, 5)
+        item.consumable.effect.turns_left = rnd.randint(1, 5)
+        generate_stats(rnd, item.consumable.effect.stats)
+    else:
+        wearable = getattr(item, kind)
+        wearable.max_stack = 1
+        generate_stats(rnd, wearable.stats)
@@ -0,0 +1,194 @@
+"""
+Drives a running game server's /server endpoint with PlayerTurn payloads at a configurable concurrency and rate, to
+measure how many decisions per second one process sustains. Payloads are the turns of a log recorded with --record,
+or synthetic game states from the game state generator. Every response must be a CharacterDecision with a known
+decision type; anything else counts as an error. NONE decisions, which the server sends when the strategy raised or
+returned no CharacterDecision, are counted apart and not as decisions.
+
+Usage: PYTHONPATH=src python src/mech/mania/starter_pack/benchmarks/load_generator.py http://127.0.0.1:8080
+       [--log turns.log | --players 4 --states 8] [--concurrency 8] [--rate 50] [--duration 30 | --requests 1000]
+"""
+import argparse
+import itertools
+import sys
+import threading
+import time
+from collections import Counter
+
+import requests
+from google.protobuf.message import DecodeError
+from mech.mania.engine.domain.model import character_pb2
+from mech.mania.engine.domain.model import player_pb2
+from mech.mania.starter_pack.benchmarks.game_state_generator import generate_game_state
+from mech.mania.starter_pack.domain.metrics import Metrics
+from mech.mania.starter_pack.entrypoints.turn_recorder import read_turns
+
+DECISION_TYPES = character_pb2.DecisionType
+
+
+def recorded_payloads(path):
+    return [player_turn for player_turn, decision in read_turns(path)]
+
+
+def synthetic_payloads(players, states, seed, **arguments):
+    """
+    @return One PlayerTurn per player for each of `states` generated game states
+    """
+    payloads = []
+    for state in range(states):
+        game_state = generate_game_state(seed=seed + state, state_id=state + 1, players_per_board=players,
+                                         **arguments)
+        for i in range(players):
+            player_turn = player_pb2.PlayerTurn()
+            player_turn.game_state.CopyFrom(game_state)
+            player_turn.player_name = f"pvp_player{i}"
+            payloads.append(player_turn.SerializeToString())
+    return payloads
+
+
+def validate(response):
+    """
+    @return A tuple (valid, outcome): valid is whether the response holds a CharacterDecision the strategy made, and
+    outcome its decision type name if so, otherwise the kind of error ("NONE" for a NONE decision, sent when the
+    strategy failed)
+    """
+    if response.status_code != 200:
+        return (False, f"http_{response.status_code}")
+    decision = character_pb2.CharacterDecision()
+    try:
+        decision.ParseFromString(response.content)
+    except DecodeError:
+        return (False, "invalid_decision")
+    if decision.decision_type not in DECISION_TYPES.values():
+        return (False, "unknown_decision_type")
+    if decision.decision_type == character_pb2.NONE:
+        return (False, "NONE")
+    return (True, DECISION_TYPES.Name(decision.decision_type))
+
+
+class LoadGenerator:
+    """
+    Posts payloads round-robin from `concurrency` threads, each with its own keep-alive connection. With a rate,
+    request i is not sent before i / rate seconds after the start (an open schedule shared by every thread);
+    without one, every thread sends its next request as soon as the previous one is answered.
+    """
+    def __init__(self, url, payloads, concurrency=8, rate=None, timeout=10.0):
+        self.url = url.rstrip("/") + "/server"
+        self.payloads = payloads
+        self.concurrency = concurrency
+        self.rate = rate
+        self.timeout = timeout
+
+        self.metrics = Metrics(window=None)
+        self.outcomes = Counter()
+        self.lock = threading.Lock()
+        self.sequence = itertools.count()
+
+    def run(self, duration=None, total=None):
+        """
+        Sends requests until `duration` seconds have passed or `total` requests were sent
+
+        @return The seconds the run took
+        """
+        self.begin = time.perf_counter()
+        self.end = None if duration is None else self.begin + duration
+        self.total = total
+        threads = [threading.Thread(target=self.worker, daemon=True) for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - self.begin
+
+    def next_request(self):
+        """
+        @return The index of the next request to send, or None once the run is over
+        """
+        index = next(self.sequence)
+        if self.total is not None and index >= self.total:
+            return None
+        if self.rate is not None:
+            delay = self.begin + index / self.rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        if self.end is not None and time.perf_counter() >= self.end:
+            return None
+        return index
+
+    def worker(self):
+        session = requests.Session()
+        while True:
+            index = self.next_request()
+            if index is None:
+                break
+
+            payload = self.payloads[index % len(self.payloads)]
+            begin = time.perf_counter()
+            try:
+                response = session.post(self.url, data=payload, timeout=self.timeout)
+                valid, outcome = validate(response)
+            except requests.Timeout:
+                valid, outcome = (False, "timeout")
+            except requests.RequestException:
+                valid, outcome = (False, "connection_error")
+            elapsed = time.perf_counter() - begin
+
+            self.metrics.observe("latency" if valid else "error_latency", elapsed)
+            with self.lock:
+                self.outcomes[outcome] += 1
+        session.close()
+
+    def report(self, elapsed):
+        """
+        @return The number of requests that did not get a decision: errors and NONE decisions
+        """
+        valid = sum(self.outcomes[name] for name in DECISION_TYPES.keys() if name != "NONE")
+        none = self.outcomes["NONE"]
+        sent = sum(self.outcomes.values())
+        errors = sent - valid - none
+
+        print(f"{sent} requests in {elapsed:.2f} s from {self.concurrency} threads"
+              + (f" at {self.rate:g}/s" if self.rate is not None else ""))
+        print(f"throughput: {valid / elapsed:.1f} decisions/s")
+        percentiles = self.metrics.get_percentiles("latency")
+        if percentiles is not None:
+            print("latency: " + "  ".join(f"p{p} {percentiles[p] * 1e3:.1f} ms" for p in Metrics.PERCENTILES))
+        print(f"NONE decisions (strategy failed): {none} ({none / sent if sent else 0:.2%})")
+        print(f"errors: {errors} ({errors / sent if sent else 0:.2%})")
+        for outcome, count in sorted(self.outcomes.items()):
+            print(f"  {outcome:<24}{count:>8}")
+        return errors + none
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("url", help="base URL of the game server, e.g. http://127.0.0.1:8080")
+    parser.add_argument("--log", help="turn log recorded with --record; synthetic turns are sent otherwise")
+    parser.add_argument("--players", type=int, default=4, help="players per synthetic game state")
+    parser.add_argument("--states", type=int, default=8, help="number of synthetic game states")
+    parser.add_argument("--size", type=int, default=50, help="width and height of the synthetic boards")
+    parser.add_argument("--seed", type=int, default=26)
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight at once")
+    parser.add_argument("--rate", type=float, default=None, help="requests per second, as fast as possible if unset")
+    parser.add_argument("--duration", type=float, default=None, help="seconds to run for")
+    parser.add_argument("--requests", type=int, default=None, help="number of requests to send")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for each decision")
+    args = parser.parse_args()
+
+    if args.log:
+        payloads = recorded_payloads(args.log)
+    else:
+        # The sample strategy cannot handle consumables in the inventory
+        payloads = synthetic_payloads(args.players, args.states, args.seed, width=args.size, height=args.size,
+                                      inventory_size=0)
+    if not payloads:
+        sys.exit("no turns to send")
+
+    duration = args.duration if args.duration is not None or args.requests is not None else 10.0
+    generator = LoadGenerator(args.url, payloads, args.concurrency, args.rate, args.timeout)
+    failures = generator.report(generator.run(duration, args.requests))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Compares Strategy.path_find_with_speed against the relaxation sweep it replaced. Both find shortest moves, but
+may pick different ones among equally short moves.
+
+Usage: PYTHONPATH=src python src/mech/mania/starter_pack/benchmarks/path_finding.py [--sizes 100 500] [--skip-sweep]
+"""
+import argparse
+import logging
+import random
+import time
+
+from mech.mania.starter_pack.domain.model.characters.position import Position
+from mech.mania.starter_pack.domain.strategy import Strategy
+
+
+def make_board(size, wall_density, seed):
+    rnd = random.Random(seed)
+    board = [[-1 if rnd.random() < wall_density else 0 for _ in range(size)] for _ in range(size)]
+    board[0][0] = 0
+    board[size - 1][size - 1] = 0
+    return board
+
+
+def sweep_path_find_with_speed(strategy, board, start, end, speed):
+    """
+    The original implementation: repeated full-board relaxation sweeps until start is reached.
+    """
+    board[start.x][start.y] = 0
+    board[end.x][end.y] = 1
+
+    iter = 0
+    while board[start.x][start.y] == 0 and iter < len(board) * len(board[0]):
+        for i in range(len(board)):
+            for j in range(len(board[0])):
+                board = strategy.update_board_step(board, i, j)
+        iter += 1
+
+    i = start.x
+    j = start.y
+    if board[i][j] == 0:
+        return None
+
+    pos = None
+    for m in range(speed):
+        i, j, pos = strategy.get_next_move_from_opt_board(board, i, j, start)
+    return pos
+
+
+def time_call(func, board, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        copy = [row[:] for row in board]
+        begin = time.perf_counter()
+        result = func(copy)
+        elapsed = time.perf_counter() - begin
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def compare_moves(strategy, board, end, bfs_pos, sweep_pos):
+    """
+    @return Whether both moves are the same or only equally close to end: the two implementations break ties
+    between equally short moves differently. A path found by only one of them is a mismatch.
+    """
+    if describe(bfs_pos) == describe(sweep_pos):
+        return "same move"
+    if bfs_pos is None or sweep_pos is None:
+        return f"MISMATCH: {'bfs' if bfs_pos is None else 'sweep'} found no path"
+    distances = [row[:] for row in board]
+    distances[end.x][end.y] = 1
+    strategy.build_distance_field(distances, end)
+    if distances[bfs_pos.x][bfs_pos.y] == distances[sweep_pos.x][sweep_pos.y]:
+        return "another, equally short move"
+    return "MOVES OF DIFFERENT LENGTHS"
+
+
+def describe(pos):
+    return None if pos is None else (pos.x, pos.y)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500])
+    parser.add_argument("--wall-density", type=float, default=0.2)
+    parser.add_argument("--speed", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=26)
+    parser.add_argument("--skip-sweep", action="store_true",
+                        help="only time the BFS implementation (the sweep takes minutes on 500x500)")
+    args = parser.parse_args()
+
+    strategy = Strategy(None)
+    strategy.logger.setLevel(logging.WARNING)
+
+    for size in args.sizes:
+        board = make_board(size, args.wall_density, args.seed)
+        start = Position.create(0, 0, "benchmark")
+        end = Position.create(size - 1, size - 1, "benchmark")
+
+        bfs_time, bfs_pos = time_call(
+            lambda b: strategy.path_find_with_speed(b, start, end, args.speed), board, args.repeat)
+        print(f"{size}x{size} bfs:   {bfs_time * 1e3:10.2f} ms  next move {describe(bfs_pos)}")
+
+        if args.skip_sweep:
+            continue
+
+        sweep_time, sweep_pos = time_call(
+            lambda b: sweep_path_find_with_speed(strategy, b, start, end, args.speed), board, 1)
+        print(f"{size}x{size} sweep: {sweep_time * 1e3:10.2f} ms  next move {describe(sweep_pos)}"
+              f"  ({sweep_time / bfs_time:.0f}x slower, {compare_moves(strategy, board, end, bfs_pos, sweep_pos)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Replays a turn log written by a game server started with --record through Strategy.make_decision, reporting how
+long each phase of a turn takes and checking that decisions are deterministic: every run of a turn must produce the
+same decision, and (unless --ignore-recorded) the same decision as the one recorded. Under gunicorn every worker
+writes its own log, <PATH>.<pid>; replay them one at a time.
+
+Usage: PYTHONPATH=src python src/mech/mania/starter_pack/benchmarks/replay.py turns.log [--runs 2] [--cold-cache]
+"""
+import argparse
+import logging
+import sys
+import time
+
+from mech.mania.engine.domain.model import player_pb2
+from mech.mania.starter_pack.domain.memory.memory_object import MemoryObject
+from mech.mania.starter_pack.domain.metrics import Metrics
+from mech.mania.starter_pack.domain.model.board.terrain import TERRAIN_CACHE
+from mech.mania.starter_pack.domain.model.game_state import GameState
+from mech.mania.starter_pack.domain.strategy import Strategy
+from mech.mania.starter_pack.entrypoints.game_server import decision_response
+from mech.mania.starter_pack.entrypoints.turn_recorder import read_turns
+
+PHASES = ("parse", "game_state", "make_decision", "serialize", "turn")
+
+
+def replay_turn(strategy, payload, metrics):
+    """
+    @return The serialized decision and the seconds make_decision took, timing each phase into metrics
+    """
+    with metrics.span("turn"):
+        player_turn = player_pb2.PlayerTurn()
+        with metrics.span("parse"):
+            player_turn.ParseFromString(payload)
+        with metrics.span("game_state"):
+            game_state = GameState(player_turn.game_state)
+
+        begin = time.perf_counter()
+        try:
+            decision = strategy.make_decision(player_turn.player_name, game_state)
+        except Exception as e:
+            print(f"make_decision raised {type(e).__name__}: {e}", file=sys.stderr)
+            decision = None
+        decision_time = time.perf_counter() - begin
+        metrics.observe("make_decision", decision_time)
+
+        with metrics.span("serialize"):
+            return decision_response(decision, logging.getLogger("replay")).SerializeToString(), decision_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log")
+    parser.add_argument("--runs", type=int, default=2, help="times each turn is decided")
+    parser.add_argument("--cold-cache", action="store_true", help="clear the terrain cache before every run")
+    parser.add_argument("--ignore-recorded", action="store_true",
+                        help="do not compare with the recorded decisions, e.g. after changing the strategy")
+    parser.add_argument("--slowest", type=int, default=5, help="how many of the slowest turns to list")
+    args = parser.parse_args()
+
+    # The strategy logs several lines per turn, which would dominate the timings
+    logging.disable(logging.INFO)
+
+    metrics = Metrics(window=None)
+    strategies = {}
+    durations = []
+    nondeterministic = []
+    differs_from_recorded = []
+
+    turns = 0
+    for index, (payload, recorded) in enumerate(read_turns(args.log)):
+        turns += 1
+        player_turn = player_pb2.PlayerTurn()
+        player_turn.ParseFromString(payload)
+        player_name = player_turn.player_name
+        if player_name not in strategies:
+            # Kept in the process rather than in Redis
+            strategies[player_name] = Strategy(MemoryObject(player_name=player_name, backend="dict"))
+
+        decisions = set()
+        for _ in range(args.runs):
+            if args.cold_cache:
+                TERRAIN_CACHE.clear()
+            decision, decision_time = replay_turn(strategies[player_name], payload, metrics)
+            decisions.add(decision)
+            durations.append((decision_time, index, player_name, player_turn.game_state.state_id))
+
+        if len(decisions) > 1:
+            nondeterministic.append(index)
+        if not args.ignore_recorded and recorded not in decisions:
+            differs_from_recorded.append(index)
+
+    print(f"{turns} turns, {args.runs} runs each")
+    print(f"{'phase':<15}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for phase in PHASES:
+        percentiles = metrics.get_percentiles(phase)
+        if percentiles is None:
+            continue
+        print(f"{phase:<15}" + "".join(f"{percentiles[p] * 1e3:10.3f}" for p in Metrics.PERCENTILES))
+
+    if args.slowest > 0 and durations:
+        print("slowest make_decision runs:")
+        for seconds, index, player_name, state_id in sorted(durations, reverse=True)[:args.slowest]:
+            print(f"  turn {index:5d}  player {player_name}  state {state_id}: {seconds * 1e3:.3f} ms")
+
+    print(f"nondeterministic turns: {len(nondeterministic)} {nondeterministic[:10]}")
+    if not args.ignore_recorded:
+        print(f"turns differing from the recorded decision: {len(differs_from_recorded)} {differs_from_recorded[:10]}")
+
+    sys.exit(1 if nondeterministic or differs_from_recorded else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Measures how the cost of a turn grows with each dimension of the game state: GameState construction,
+Strategy.make_decision, Strategy.process_board, Strategy.get_item_dict and path finding (API.find_path). One dimension
+is varied at a time; the others keep their baseline value. Times are the best of --repeat runs.
+
+Usage: PYTHONPATH=src python src/mech/mania/starter_pack/benchmarks/scaling.py [--dimensions size items] [--repeat 3]
+"""
+import argparse
+import logging
+import time
+
+from mech.mania.engine.domain.model import game_pb2
+from mech.mania.starter_pack.benchmarks.game_state_generator import generate_game_state
+from mech.mania.starter_pack.domain.api import API
+from mech.mania.starter_pack.domain.memory.memory_object import MemoryObject
+from mech.mania.starter_pack.domain.model.board.terrain import TERRAIN_CACHE
+from mech.mania.starter_pack.domain.model.game_state import GameState
+from mech.mania.starter_pack.domain.strategy import Strategy
+
+BASELINE = {
+    "width": 50,
+    "height": 50,
+    "impassable_density": 0.2,
+    "portals": 2,
+    "boards": 1,
+    "players_per_board": 4,
+    "monsters_per_board": 10,
+    "items_per_tile": 0.05,
+    # With items in its inventory the strategy usually just equips one; empty inventories exercise the whole turn
+    "inventory_size": 0,
+}
+
+# dimension -> (generator arguments to vary, values)
+DIMENSIONS = {
+    "size": (("width", "height"), [25, 50, 100, 200]),
+    "density": (("impassable_density",), [0.0, 0.1, 0.2, 0.4]),
+    "portals": (("portals",), [1, 4, 16, 64]),
+    "boards": (("boards",), [1, 4, 16]),
+    "players": (("players_per_board",), [2, 8, 32, 128]),
+    "monsters": (("monsters_per_board",), [5, 20, 80, 320]),
+    "items": (("items_per_tile",), [0.01, 0.1, 0.5, 2.0]),
+}
+
+MEASURES = ("parse", "game_state", "make_decision", "process_board", "get_item_dict", "find_path")
+
+
+def best_time(func, repeat, warm_cache):
+    best = None
+    for _ in range(repeat):
+        if not warm_cache:
+            TERRAIN_CACHE.clear()
+        begin = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - begin
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure(arguments, seed, repeat, warm_cache):
+    """
+    @return {measure: best seconds} for a game state generated with the given arguments
+    """
+    payload = generate_game_state(seed=seed, **arguments).SerializeToString()
+    proto = game_pb2.GameState()
+    proto.ParseFromString(payload)
+
+    player_name = "pvp_player0"
+    me = GameState(proto).get_player(player_name)
+    board_id = me.get_position().get_board_id()
+    monsters = GameState(proto).get_monsters_on_board(board_id)
+    target = max(monsters, key=lambda m: me.get_position().manhattan_distance(m.get_position())).get_position()
+
+    strategy = Strategy(MemoryObject(player_name=player_name, backend="dict"))
+
+    def parse():
+        game_pb2.GameState().ParseFromString(payload)
+
+    def make_decision():
+        strategy.make_decision(player_name, GameState(proto))
+
+    def on_board(func):
+        # get_item_dict and process_board work on the board make_decision selected
+        def run():
+            game_state = GameState(proto)
+            strategy.curr_pos = game_state.get_player(player_name).get_position()
+            strategy.board = game_state.get_board(board_id)
+            func()
+        return run
+
+    def find_path():
+        API(GameState(proto), player_name).find_path(me.get_position(), target)
+
+    functions = {
+        "parse": parse,
+        "game_state": lambda: GameState(proto).get_board(board_id).get_terrain(),
+        "make_decision": make_decision,
+        "process_board": on_board(lambda: strategy.process_board(strategy.board)),
+        "get_item_dict": on_board(strategy.get_item_dict),
+        "find_path": find_path,
+    }
+    return {name: best_time(functions[name], repeat, warm_cache) for name in MEASURES}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dimensions", nargs="+", choices=list(DIMENSIONS), default=list(DIMENSIONS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=26)
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="keep the terrain cache between runs, as on every turn after a board's first")
+    args = parser.parse_args()
+
+    # The strategy logs several lines per turn, which would dominate the timings
+    logging.disable(logging.INFO)
+
+    for dimension in args.dimensions:
+        keys, values = DIMENSIONS[dimension]
+        print(f"\n{dimension:<10}" + "".join(f"{name + ' ms':>18}" for name in MEASURES))
+        for value in values:
+            arguments = dict(BASELINE)
+            arguments.update({key: value for key in keys})
+            times = measure(arguments, args.seed, args.repeat, args.warm_cache)
+            print(f"{value:<10}" + "".join(f"{times[name] * 1e3:18.3f}" for name in MEASURES))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,11 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from google.protobuf.message import DecodeError
 from mech.mania.engine.domain.model import api_pb2
 from mech.mania.engine.domain.model import character_pb2
 from mech.mania.engine.domain.model import game_pb2
@@ -13,13 +20,74 @@ from mech.mania.starter_pack.domain.model.items import consumable
 from mech.mania.starter_pack.domain.model.items import hat
 from mech.mania.starter_pack.domain.model.items import shoes
 from mech.mania.starter_pack.domain.model.items import weapon
+from mech.mania.starter_pack.domain.local_queries import LocalQueries
+from mech.mania.starter_pack.domain.metrics import METRICS
+
+
+class APIQuery:
+    """
+    A single API request: the engine endpoint, the request message (without its gameState), an empty response
+    message and a function turning the parsed response into the value returned by the API method.
+    Queries answered in-process have no endpoint; their convert function is called without arguments.
+    Both kinds are named after the engine endpoint in metrics.
+    """
+    def __init__(self, endpoint, payload, response, convert, name=None):
+        self.endpoint = endpoint
+        self.payload = payload
+        self.response = response
+        self.convert = convert
+        self.name = endpoint if name is None else name
+
+    @classmethod
+    def local(cls, name, compute):
+        return cls(None, None, None, compute, name)
+
+    def is_local(self):
+        return self.endpoint is None
 
 
 class API:
-    def __init__(self, game_state, player_name):
+    # Where remote queries are sent unless overridden by the api_server_url parameter or the API_SERVER_URL
+    # environment variable, e.g. to use a local entrypoints/api_stand_in_server.py
+    API_SERVER_URL = "http://engine-test.mechmania.io:8082/api/"
+
+    # Shared by every API instance so that connections to the engine are kept alive between turns
+    SESSION = None
+    SESSION_LOCK = threading.Lock()
+    POOL_SIZE = 16
+
+    CONNECT_TIMEOUT = 1.0
+    READ_TIMEOUT = 5.0
+    MAX_RETRIES = 1
+
+    def __init__(self, game_state, player_name, use_remote_queries=False, connect_timeout=None,
+                 read_timeout=None, max_retries=None, turn_budget=None, api_server_url=None):
+        """
+        @param use_remote_queries: Send queries to the engine's API server instead of answering them in-process
+        @param connect_timeout: Seconds to wait for a connection to the engine
+        @param read_timeout: Seconds to wait for the engine to answer a request
+        @param max_retries: How many times a request is retried after a connection error or timeout
+        @param turn_budget: Total seconds this API may spend on remote queries; once used up, they return None
+        right away instead of blocking the decision
+        @param api_server_url: Base URL of the API server remote queries are sent to, ending with a slash
+        """
+        self.local_game_state = game_state
         self.game_state = game_state.build_proto_class()
         self.player_name = player_name
-        self.API_SERVER_URL = "http://engine-test.mechmania.io:8082/api/"
+        self.API_SERVER_URL = api_server_url if api_server_url else os.getenv("API_SERVER_URL", API.API_SERVER_URL)
+
+        # Every query is answered from the game state we already hold unless the engine's endpoints are
+        # explicitly requested (e.g. for parity checks)
+        self.use_remote_queries = use_remote_queries
+        self.local_queries = LocalQueries(game_state)
+
+        # Serialized game state shared by every request this turn; encoded on the first remote query
+        self.encoded_game_state = None
+
+        self.connect_timeout = self.CONNECT_TIMEOUT if connect_timeout is None else connect_timeout
+        self.read_timeout = self.READ_TIMEOUT if read_timeout is None else read_timeout
+        self.max_retries = self.MAX_RETRIES if max_retries is None else max_retries
+        self.deadline = None if turn_budget is None else time.monotonic() + turn_budget
 
     def find_path(self, start, end):
         """
@@ -28,29 +96,26 @@ class API:
         @param start: The position to start from
         @param end: The position to end at
         @return A list of Position objects from start to end or an empty list if no path is possible.
-        */
         """
-        if isinstance(start, position.Position) and isinstance(end, position.Position):
-            url = self.API_SERVER_URL + "pathFinding"
-            payload = api_pb2.APIPathFindingRequest()
-            payload.gameState.CopyFrom(self.game_state)
-            payload.start.CopyFrom(start.build_proto_class())
-            payload.end.CopyFrom(end.build_proto_class())
+        return self.run(self.find_path_query(start, end))
 
-            response = requests.post(url, headers={'Content-Type': 'application/protobuf'},
-                                     data=payload.SerializeToString())
-            APIresponse = api_pb2.APIPathFindingResponse()
-            APIresponse.ParseFromString(response.content)
+    def find_path_query(self, start, end):
+        if not (isinstance(start, position.Position) and isinstance(end, position.Position)):
+            return None
 
-            if APIresponse.status.status != 200:
-                return None
+        if not self.use_remote_queries:
+            return APIQuery.local("pathFinding", lambda: self.local_queries.find_path(start, end))
+
+        payload = api_pb2.APIPathFindingRequest()
+        payload.start.CopyFrom(start.build_proto_class())
+        payload.end.CopyFrom(end.build_proto_class())
 
+        def convert(APIresponse):
             path = []
             for tile in APIresponse.path:
                 path.append(position.Position(tile))
             return path
-        else:
-            return None
+        return APIQuery("pathFinding", payload, api_pb2.APIPathFindingResponse(), convert)
 
     def find_enemies_by_distance(self, pos):
         """
@@ -59,26 +124,26 @@ class API:
         @param position: The center position to search around
         @return A List of Characters sorted by distance from the given position
         """
-        if isinstance(pos, position.Position):
-            url = self.API_SERVER_URL + "findEnemiesByDistance"
-            payload = api_pb2.APIFindEnemiesByDistanceRequest()
-            payload.gameState.CopyFrom(self.game_state)
-            payload.position.CopyFrom(pos.build_proto_class())
-            payload.player_name = self.player_name
+        return self.run(self.find_enemies_by_distance_query(pos))
 
-            response = requests.post(url, headers={'Content-Type': 'application/protobuf'}, data=payload.SerializeToString())
+    def find_enemies_by_distance_query(self, pos):
+        if not isinstance(pos, position.Position):
+            return None
 
-            APIresponse = api_pb2.APIFindEnemiesByDistanceResponse()
-            APIresponse.ParseFromString(response.content)
-            if APIresponse.status.status != 200:
-                return None
+        if not self.use_remote_queries:
+            return APIQuery.local("findEnemiesByDistance",
+                                  lambda: self.local_queries.find_enemies_by_distance(pos, self.player_name))
+
+        payload = api_pb2.APIFindEnemiesByDistanceRequest()
+        payload.position.CopyFrom(pos.build_proto_class())
+        payload.player_name = self.player_name
 
+        def convert(APIresponse):
             enemies = []
             for enemy in APIresponse.enemies:
                 enemies.append(character.Character(enemy))
             return enemies
-        else:
-            return None
+        return APIQuery("findEnemiesByDistance", payload, api_pb2.APIFindEnemiesByDistanceResponse(), convert)
 
     def findMonstersByExp(self, pos):
         """
@@ -87,25 +152,24 @@ class API:
         @param position: The center position to search around
         @return A List of Monster objects sorted by XP
         """
-        if isinstance(pos, position.Position):
-            url = self.API_SERVER_URL + "findMonstersByExp"
-            payload = api_pb2.APIFindMonstersByExpRequest()
-            payload.gameState.CopyFrom(self.game_state)
-            payload.position.CopyFrom(pos.build_proto_class())
+        return self.run(self.find_monsters_by_exp_query(pos))
 
-            response = requests.post(url, headers={'Content-Type': 'application/protobuf'}, data=payload.SerializeToString())
+    def find_monsters_by_exp_query(self, pos):
+        if not isinstance(pos, position.Position):
+            return None
 
-            APIresponse = api_pb2.APIFindMonstersByExpResponse()
-            APIresponse.ParseFromString(response.content)
-            if APIresponse.status.status != 200:
-                return None
+        if not self.use_remote_queries:
+            return APIQuery.local("findMonstersByExp", lambda: self.local_queries.find_monsters_by_exp(pos))
 
+        payload = api_pb2.APIFindMonstersByExpRequest()
+        payload.position.CopyFrom(pos.build_proto_class())
+
+        def convert(APIresponse):
             monsters = []
             for m in APIresponse.monsters:
                 monsters.append(monster.Monster(m))
             return monsters
-        else:
-            return None
+        return APIQuery("findMonstersByExp", payload, api_pb2.APIFindMonstersByExpResponse(), convert)
 
     def find_items_in_range_by_distance(self, pos, range):
         """
@@ -115,20 +179,23 @@ class API:
         @param range: The range to search within
         @return A List of Items found in the search
         """
-        if isinstance(pos, position.Position) and isinstance(range, int):
-            url = self.API_SERVER_URL + "findItemsInRangeByDistance"
-            payload = api_pb2.APIFindItemsInRangeByDistanceRequest()
-            payload.gameState.CopyFrom(self.game_state)
-            payload.position.CopyFrom(pos.build_proto_class())
-            payload.player_name = self.player_name
-            payload.range = range
-
-            response = requests.post(url, headers={'Content-Type': 'application/protobuf'}, data=payload.SerializeToString())
-            APIresponse = api_pb2.APIFindItemsInRangeByDistanceResponse()
-            APIresponse.ParseFromString(response.content)
-            if APIresponse.status.status != 200:
-                return None
+        return self.run(self.find_items_in_range_by_distance_query(pos, range))
+
+    def find_items_in_range_by_distance_query(self, pos, range):
+        if not (isinstance(pos, position.Position) and isinstance(range, int)):
+            return None
+
+        if not self.use_remote_queries:
+            return APIQuery.local(
+                "findItemsInRangeByDistance",
+                lambda: self.local_queries.find_items_in_range_by_distance(pos, self.player_name, range))
 
+        payload = api_pb2.APIFindItemsInRangeByDistanceRequest()
+        payload.position.CopyFrom(pos.build_proto_class())
+        payload.player_name = self.player_name
+        payload.range = range
+
+        def convert(APIresponse):
             items = []
             item_positions = []
             for i in APIresponse.items:
@@ -149,8 +216,8 @@ class API:
                 item_positions.append(position.Position(i_pos))
 
             return (items, item_positions)
-        else:
-            return None
+        return APIQuery("findItemsInRangeByDistance", payload, api_pb2.APIFindItemsInRangeByDistanceResponse(),
+                        convert)
 
     def find_enemies_in_range_of_attack_by_distance(self, pos):
         """
@@ -159,24 +226,28 @@ class API:
         @param position: The position to assume you are at
         @return A List of Characters sorted by distance.
         """
-        if isinstance(pos, position.Position):
-            url = self.API_SERVER_URL + "findEnemiesInRangeOfAttackByDistance"
-            payload = api_pb2.APIFindEnemiesInRangeOfAttackByDistanceRequest()
-            payload.gameState.CopyFrom(self.game_state)
-            payload.position.CopyFrom(pos.build_proto_class())
-            payload.player_name = self.player_name
+        return self.run(self.find_enemies_in_range_of_attack_by_distance_query(pos))
 
-            response = requests.post(url, headers={'Content-Type': 'application/protobuf'}, data=payload.SerializeToString())
-            APIresponse = api_pb2.APIFindEnemiesInRangeOfAttackByDistanceResponse()
-            APIresponse.ParseFromString(response.content)
-            if APIresponse.status.status != 200:
-                return None
+    def find_enemies_in_range_of_attack_by_distance_query(self, pos):
+        if not isinstance(pos, position.Position):
+            return None
+
+        if not self.use_remote_queries:
+            return APIQuery.local(
+                "findEnemiesInRangeOfAttackByDistance",
+                lambda: self.local_queries.find_enemies_in_range_of_attack_by_distance(pos, self.player_name))
+
+        payload = api_pb2.APIFindEnemiesInRangeOfAttackByDistanceRequest()
+        payload.position.CopyFrom(pos.build_proto_class())
+        payload.player_name = self.player_name
+
+        def convert(APIresponse):
             enemies = []
             for enemy in APIresponse.enemies:
                 enemies.append(character.Character(enemy))
             return enemies
-        else:
-            return None
+        return APIQuery("findEnemiesInRangeOfAttackByDistance", payload,
+                        api_pb2.APIFindEnemiesInRangeOfAttackByDistanceResponse(), convert)
 
     def find_all_enemies_hit(self, pos):
         """
@@ -186,24 +257,26 @@ class API:
         @param position: The position to test your attack at
         @return A List of Characters who would be hit by your attack
         """
-        if isinstance(pos, position.Position):
-            url = self.API_SERVER_URL + "findAllEnemiesHit"
-            payload = api_pb2.APIFindAllEnemiesHitRequest()
-            payload.gameState.CopyFrom(self.game_state)
-            payload.position.CopyFrom(pos.build_proto_class())
-            payload.player_name = self.player_name
+        return self.run(self.find_all_enemies_hit_query(pos))
 
-            response = requests.post(url, headers={'Content-Type': 'application/protobuf'}, data=payload.SerializeToString())
-            APIresponse = api_pb2.APIFindAllEnemiesHitResponse()
-            APIresponse.ParseFromString(response.content)
-            if APIresponse.status.status != 200:
-                return None
+    def find_all_enemies_hit_query(self, pos):
+        if not isinstance(pos, position.Position):
+            return None
+
+        if not self.use_remote_queries:
+            return APIQuery.local("findAllEnemiesHit",
+                                  lambda: self.local_queries.find_all_enemies_hit(pos, self.player_name))
+
+        payload = api_pb2.APIFindAllEnemiesHitRequest()
+        payload.position.CopyFrom(pos.build_proto_class())
+        payload.player_name = self.player_name
+
+        def convert(APIresponse):
             enemies = []
             for enemy in APIresponse.enemies_hit:
                 enemies.append(character.Character(enemy))
             return enemies
-        else:
-            return None
+        return APIQuery("findAllEnemiesHit", payload, api_pb2.APIFindAllEnemiesHitResponse(), convert)
 
     def in_range_of_attack(self, pos):
         """
@@ -212,22 +285,24 @@ class API:
         @param position: the position to test the safety of
         @return True if any enemy can attack in one turn, False otherwise
         """
-        if isinstance(pos, position.Position):
-            url = self.API_SERVER_URL + "inRangeOfAttack"
-            payload = api_pb2.APIInRangeOfAttackRequest()
-            payload.gameState.CopyFrom(self.game_state)
-            payload.position.CopyFrom(pos.build_proto_class())
-            payload.player_name = self.player_name
+        return self.run(self.in_range_of_attack_query(pos))
 
-            response = requests.post(url, headers={'Content-Type': 'application/protobuf'}, data=payload.SerializeToString())
-            APIresponse = api_pb2.APIInRangeOfAttackResponse()
-            APIresponse.ParseFromString(response.content)
-            if APIresponse.status.status != 200:
-                return None
-            return APIresponse.inRangeOfAttack
-        else:
+    def in_range_of_attack_query(self, pos):
+        if not isinstance(pos, position.Position):
             return None
 
+        if not self.use_remote_queries:
+            return APIQuery.local("inRangeOfAttack",
+                                  lambda: self.local_queries.in_range_of_attack(pos, self.player_name))
+
+        payload = api_pb2.APIInRangeOfAttackRequest()
+        payload.position.CopyFrom(pos.build_proto_class())
+        payload.player_name = self.player_name
+
+        def convert(APIresponse):
+            return APIresponse.inRangeOfAttack
+        return APIQuery("inRangeOfAttack", payload, api_pb2.APIInRangeOfAttackResponse(), convert)
+
     def find_closest_portal(self, pos):
         """
         Finds the closest portal to the given position
@@ -235,37 +310,302 @@ class API:
         @param position: The position to begin searching from
         @return A Position representing the location of the closest portal, or null if an error occurred.
         """
-        if isinstance(pos, position.Position):
-            url = self.API_SERVER_URL + "findClosestPortal"
-            payload = api_pb2.APIFindClosestPortalRequest()
-            payload.gameState.CopyFrom(self.game_state)
-            payload.position.CopyFrom(pos.build_proto_class())
+        return self.run(self.find_closest_portal_query(pos))
 
-            response = requests.post(url, headers={'Content-Type': 'application/protobuf'}, data=payload.SerializeToString())
-            APIresponse = api_pb2.APIFindClosestPortalResponse()
-            APIresponse.ParseFromString(response.content)
-            if APIresponse.status.status != 200:
-                return None
-            return position.Position(APIresponse.portal)
-        else:
+    def find_closest_portal_query(self, pos):
+        if not isinstance(pos, position.Position):
             return None
 
+        if not self.use_remote_queries:
+            return APIQuery.local("findClosestPortal", lambda: self.local_queries.find_closest_portal(pos))
+
+        payload = api_pb2.APIFindClosestPortalRequest()
+        payload.position.CopyFrom(pos.build_proto_class())
+
+        def convert(APIresponse):
+            return position.Position(APIresponse.portal)
+        return APIQuery("findClosestPortal", payload, api_pb2.APIFindClosestPortalResponse(), convert)
+
     def get_leaderboard(self):
         """
         @return The list of current players sorted by total XP
         """
-        url = self.API_SERVER_URL + "leaderBoard"
+        return self.run(self.get_leaderboard_query())
+
+    def get_leaderboard_query(self):
+        if not self.use_remote_queries:
+            return APIQuery.local("leaderBoard", self.local_queries.get_leaderboard)
+
         payload = api_pb2.APILeaderBoardRequest()
-        payload.gameState.CopyFrom(self.game_state)
 
-        response = requests.post(url, headers={'Content-Type': 'application/protobuf'}, data=payload.SerializeToString())
-        APIresponse = api_pb2.APILeaderBoardResponse()
-        APIresponse.ParseFromString(response.content)
-        if APIresponse.status.status != 200:
+        def convert(APIresponse):
+            leaderBoard = []
+            for p in APIresponse.leaderBoard:
+                leaderBoard.append(player.Player(p))
+            return leaderBoard
+        return APIQuery("leaderBoard", payload, api_pb2.APILeaderBoardResponse(), convert)
+
+    def batch(self, max_workers=8):
+        """
+        @return An APIBatch that sends several queries together, see APIBatch
+        """
+        return APIBatch(self, max_workers)
+
+    def asynchronous(self):
+        """
+        @return An AsyncAPI with awaitable versions of the API methods, see AsyncAPI
+        """
+        return AsyncAPI(self)
+
+    def run(self, query):
+        """
+        Sends a query (or answers it in-process) and converts the response
+
+        @param query: An APIQuery, or None if the arguments of the API method were invalid
+        @return The converted response, or None if the request failed
+        """
+        if query is None:
+            return None
+
+        with METRICS.span("api." + query.name):
+            if query.is_local():
+                return query.convert()
+            return self.send(query)
+
+    def send(self, query):
+        """
+        Sends a remote query to the engine, within the timeouts, retries and turn budget of this API
+        """
+        if self.remaining_budget() <= 0:
             return None
 
-        leaderBoard = []
-        for p in APIresponse.leaderBoard:
-            leaderBoard.append(player.Player(p))
+        url = self.API_SERVER_URL + query.endpoint
+        with METRICS.span("api.serialize"):
+            data = self.serialize(query.payload)
+        session = self.get_session()
+
+        for attempt in range(self.max_retries + 1):
+            remaining = self.remaining_budget()
+            if remaining <= 0:
+                return None
+
+            try:
+                response = session.post(url, headers={'Content-Type': 'application/protobuf'}, data=data,
+                                        timeout=(min(self.connect_timeout, remaining),
+                                                 min(self.read_timeout, remaining)))
+            except (requests.ConnectionError, requests.Timeout):
+                continue
+            except requests.RequestException:
+                return None
+
+            if response.status_code != 200:
+                return None
+
+            APIresponse = query.response
+            try:
+                APIresponse.ParseFromString(response.content)
+            except DecodeError:
+                return None
+            if APIresponse.status.status != 200:
+                return None
+
+            return query.convert(APIresponse)
+
+        return None
+
+    def remaining_budget(self):
+        """
+        @return The seconds left in this API's turn budget (infinite if it has none)
+        """
+        if self.deadline is None:
+            return float("inf")
+        return self.deadline - time.monotonic()
+
+    @classmethod
+    def get_session(cls):
+        """
+        @return The keep-alive requests.Session shared by all API instances
+        """
+        if cls.SESSION is None:
+            with cls.SESSION_LOCK:
+                if cls.SESSION is None:
+                    session = requests.Session()
+                    adapter = requests.adapters.HTTPAdapter(pool_connections=cls.POOL_SIZE,
+                                                            pool_maxsize=cls.POOL_SIZE)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    cls.SESSION = session
+        return cls.SESSION
+
+    def get_encoded_game_state(self):
+        """
+        @return The serialized game state, encoded only once per API instance
+        """
+        if self.encoded_game_state is None:
+            self.encoded_game_state = self.game_state.SerializeToString()
+        return self.encoded_game_state
+
+    def serialize(self, payload):
+        """
+        Serializes a request with the current game state as its gameState field
+        """
+        # Every API request message declares gameState as field 1. Protobuf parsers accept fields in any order,
+        # so the pre-encoded game state is prepended to the encoding of the remaining (small) fields instead of
+        # deep-copying and re-encoding the whole game state for every request.
+        return encode_game_state_field(self.get_encoded_game_state()) + payload.SerializeToString()
+
+
+class APIBatch:
+    """
+    Collects several API queries and sends them together. Remote queries are sent concurrently and execute()
+    returns the results in the order the queries were added.
+    Each query method returns the index of its result in that list.
+
+        batch = api.batch()
+        for tile in candidate_tiles:
+            batch.in_range_of_attack(tile)
+        in_danger = batch.execute()
+    """
+    def __init__(self, api, max_workers=8):
+        self.api = api
+        self.max_workers = max_workers
+        self.queries = []
+
+    def add(self, query):
+        self.queries.append(query)
+        return len(self.queries) - 1
+
+    def find_path(self, start, end):
+        return self.add(self.api.find_path_query(start, end))
+
+    def find_enemies_by_distance(self, pos):
+        return self.add(self.api.find_enemies_by_distance_query(pos))
+
+    def findMonstersByExp(self, pos):
+        return self.add(self.api.find_monsters_by_exp_query(pos))
+
+    def find_items_in_range_by_distance(self, pos, range):
+        return self.add(self.api.find_items_in_range_by_distance_query(pos, range))
 
-        return leaderBoard
+    def find_enemies_in_range_of_attack_by_distance(self, pos):
+        return self.add(self.api.find_enemies_in_range_of_attack_by_distance_query(pos))
+
+    def find_all_enemies_hit(self, pos):
+        return self.add(self.api.find_all_enemies_hit_query(pos))
+
+    def in_range_of_attack(self, pos):
+        return self.add(self.api.in_range_of_attack_query(pos))
+
+    def find_closest_portal(self, pos):
+        return self.add(self.api.find_closest_portal_query(pos))
+
+    def get_leaderboard(self):
+        return self.add(self.api.get_leaderboard_query())
+
+    def execute(self):
+        """
+        Runs every collected query and clears the batch
+
+        @return A list with one result per query, None for queries that failed
+        """
+        queries, self.queries = self.queries, []
+        results = [None] * len(queries)
+
+        remote = []
+        for i, query in enumerate(queries):
+            if query is None or query.is_local():
+                results[i] = self.api.run(query)
+            else:
+                remote.append(i)
+
+        if remote:
+            # Encode the game state up front so worker threads do not race to do it
+            self.api.get_encoded_game_state()
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(remote)))) as executor:
+                futures = {i: executor.submit(self.api.run, queries[i]) for i in remote}
+            for i, future in futures.items():
+                try:
+                    results[i] = future.result()
+                except Exception:
+                    results[i] = None
+
+        return results
+
+
+class AsyncAPI:
+    """
+    Awaitable versions of the API methods for strategies running on an event loop (see async_game_server.py).
+    Remote queries run on a shared thread pool so the event loop is never blocked; awaiting several of them
+    together takes as long as the slowest one instead of the sum of all of them.
+
+        api = self.api.asynchronous()
+        in_danger = await asyncio.gather(*[api.in_range_of_attack(tile) for tile in candidate_tiles])
+    """
+    EXECUTOR = None
+    EXECUTOR_LOCK = threading.Lock()
+
+    def __init__(self, api):
+        self.api = api
+
+    async def find_path(self, start, end):
+        return await self.run(self.api.find_path_query(start, end))
+
+    async def find_enemies_by_distance(self, pos):
+        return await self.run(self.api.find_enemies_by_distance_query(pos))
+
+    async def findMonstersByExp(self, pos):
+        return await self.run(self.api.find_monsters_by_exp_query(pos))
+
+    async def find_items_in_range_by_distance(self, pos, range):
+        return await self.run(self.api.find_items_in_range_by_distance_query(pos, range))
+
+    async def find_enemies_in_range_of_attack_by_distance(self, pos):
+        return await self.run(self.api.find_enemies_in_range_of_attack_by_distance_query(pos))
+
+    async def find_all_enemies_hit(self, pos):
+        return await self.run(self.api.find_all_enemies_hit_query(pos))
+
+    async def in_range_of_attack(self, pos):
+        return await self.run(self.api.in_range_of_attack_query(pos))
+
+    async def find_closest_portal(self, pos):
+        return await self.run(self.api.find_closest_portal_query(pos))
+
+    async def get_leaderboard(self):
+        return await self.run(self.api.get_leaderboard_query())
+
+    async def run(self, query):
+        """
+        @return The converted response of the query, or None if it failed
+        """
+        if query is None or query.is_local():
+            return self.api.run(query)
+
+        # Encode the game state here so pool threads do not race to do it
+        self.api.get_encoded_game_state()
+        return await asyncio.get_running_loop().run_in_executor(self.get_executor(), self.api.run, query)
+
+    @classmethod
+    def get_executor(cls):
+        """
+        @return The thread pool shared by all AsyncAPI instances, as large as the engine connection pool
+        """
+        if cls.EXECUTOR is None:
+            with cls.EXECUTOR_LOCK:
+                if cls.EXECUTOR is None:
+                    cls.EXECUTOR = ThreadPoolExecutor(max_workers=API.POOL_SIZE)
+        return cls.EXECUTOR
+
+
+def encode_game_state_field(encoded_game_state):
+    """
+    @return The wire encoding of field 1 (gameState) holding the given serialized GameState
+    """
+    # Tag: field number 1, wire type 2 (length-delimited)
+    header = bytearray([0x0A])
+    length = len(encoded_game_state)
+    while length > 0x7F:
+        header.append((length & 0x7F) | 0x80)
+        length >>= 7
+    header.append(length)
+    return bytes(header) + encoded_game_state
@@ -0,0 +1,167 @@
+from collections import defaultdict
+
+from mech.mania.starter_pack.domain.model.characters.character import Character
+from mech.mania.starter_pack.domain.model.characters.monster import Monster
+from mech.mania.starter_pack.domain.model.characters.player import Player
+from mech.mania.starter_pack.domain.model.characters.position import Position
+from mech.mania.starter_pack.domain.path_finding import PathFinder
+
+
+def manhattan_distance(position_proto, x, y):
+    return abs(position_proto.x - x) + abs(position_proto.y - y)
+
+
+class CharacterIndex:
+    """
+    The characters of a game state partitioned by the board they stand on. Each entry is a tuple
+    (name, character proto, player or monster proto, is_player).
+    """
+    def __init__(self, game_state_proto):
+        self.boards = defaultdict(list)
+        for name, player_proto in game_state_proto.player_names.items():
+            self.boards[player_proto.character.position.board_id].append(
+                (name, player_proto.character, player_proto, True))
+        for name, monster_proto in game_state_proto.monster_names.items():
+            self.boards[monster_proto.character.position.board_id].append(
+                (name, monster_proto.character, monster_proto, False))
+
+    def on_board(self, board_id):
+        return self.boards.get(board_id, [])
+
+
+class LocalQueries:
+    """
+    In-process implementations of the engine's API queries, computed from the GameState we already hold.
+    Every method mirrors the API method of the same name and returns the same types.
+
+    Enemies of a player are all living characters on the same board except the player itself.
+    Distances are Manhattan distances; ties keep the game state's order (players before monsters).
+    """
+    def __init__(self, game_state):
+        self.game_state = game_state
+        self.game_state_proto = game_state.build_proto_class()
+        self.index = None
+        self.path_finders = {}
+
+    def get_index(self):
+        if self.index is None:
+            self.index = CharacterIndex(self.game_state_proto)
+        return self.index
+
+    def enemies_by_distance(self, pos, player_name):
+        """
+        @return (distance, name, character proto, container proto, is_player) tuples sorted by distance
+        """
+        enemies = []
+        for name, character_proto, proto, is_player in self.get_index().on_board(pos.board_id):
+            if name == player_name or character_proto.is_dead:
+                continue
+            distance = manhattan_distance(character_proto.position, pos.x, pos.y)
+            enemies.append((distance, name, character_proto, proto, is_player))
+        enemies.sort(key=lambda enemy: enemy[0])
+        return enemies
+
+    def get_path_finder(self, board_id):
+        if board_id not in self.path_finders:
+            if board_id not in self.game_state_proto.board_names:
+                return None
+            self.path_finders[board_id] = PathFinder(self.game_state.get_board(board_id))
+        return self.path_finders[board_id]
+
+    def find_path(self, start, end):
+        path_finder = self.get_path_finder(start.get_board_id())
+        if path_finder is None:
+            return None
+        return path_finder.find_path(start, end)
+
+    def find_enemies_by_distance(self, pos, player_name):
+        return [Character(enemy[2]) for enemy in self.enemies_by_distance(pos, player_name)]
+
+    def find_monsters_by_exp(self, pos):
+        monsters = []
+        for name, character_proto, proto, is_player in self.get_index().on_board(pos.board_id):
+            if not is_player and not character_proto.is_dead:
+                monsters.append(Monster(proto))
+        # Highest total experience first; closer monsters first among equals
+        monsters.sort(key=lambda m: (-m.get_total_experience(), m.get_position().manhattan_distance(pos)))
+        return monsters
+
+    def tiles_with_items_in_range(self, pos, item_range):
+        """
+        @return (distance, x, y) of every tile within item_range of pos that holds items, sorted by distance, or
+        None if the board does not exist or the range is negative
+        """
+        if pos.board_id not in self.game_state_proto.board_names or item_range < 0:
+            return None
+
+        board_proto = self.game_state_proto.board_names[pos.board_id]
+        tiles = []
+        for x in range(max(0, pos.x - item_range), min(board_proto.width, pos.x + item_range + 1)):
+            reach = item_range - abs(x - pos.x)
+            for y in range(max(0, pos.y - reach), min(board_proto.height, pos.y + reach + 1)):
+                if board_proto.grid[x * board_proto.height + y].items:
+                    tiles.append((abs(x - pos.x) + abs(y - pos.y), x, y))
+        tiles.sort(key=lambda tile: tile[0])
+        return tiles
+
+    def find_items_in_range_by_distance(self, pos, player_name, item_range):
+        tiles = self.tiles_with_items_in_range(pos, item_range)
+        if tiles is None:
+            return None
+
+        board = self.game_state.get_board(pos.board_id)
+        items = []
+        positions = []
+        for distance, x, y in tiles:
+            tile_position = Position.create(x, y, pos.board_id)
+            for item in board.grid[x][y].get_items():
+                items.append(item)
+                positions.append(tile_position)
+        return (items, positions)
+
+    def find_enemies_in_range_of_attack_by_distance(self, pos, player_name):
+        player_proto = self.get_player_proto(player_name)
+        if player_proto is None:
+            return None
+
+        weapon_range = player_proto.character.weapon.range
+        return [Character(enemy[2]) for enemy in self.enemies_by_distance(pos, player_name)
+                if enemy[0] <= weapon_range]
+
+    def find_all_enemies_hit(self, pos, player_name):
+        player_proto = self.get_player_proto(player_name)
+        if player_proto is None:
+            return None
+
+        character_proto = player_proto.character
+        attacker = character_proto.position
+        if attacker.board_id != pos.board_id or \
+                manhattan_distance(attacker, pos.x, pos.y) > character_proto.weapon.range:
+            # The attack would not happen at all
+            return []
+
+        splash_radius = character_proto.weapon.splash_radius
+        return [Character(enemy[2]) for enemy in self.enemies_by_distance(pos, player_name)
+                if enemy[0] <= splash_radius]
+
+    def in_range_of_attack(self, pos, player_name):
+        for distance, name, character_proto, proto, is_player in self.enemies_by_distance(pos, player_name):
+            if distance <= character_proto.weapon.range:
+                return True
+        return False
+
+    def find_closest_portal(self, pos):
+        path_finder = self.get_path_finder(pos.get_board_id())
+        if path_finder is None or not path_finder.in_bounds(pos):
+            return None
+        return path_finder.terrain.get_portal_tables().closest_portal(pos.x, pos.y)
+
+    def get_leaderboard(self):
+        players = [Player(proto) for proto in self.game_state_proto.player_names.values()]
+        players.sort(key=lambda p: -p.get_total_experience())
+        return players
+
+    def get_player_proto(self, player_name):
+        if player_name not in self.game_state_proto.player_names:
+            return None
+        return self.game_state_proto.player_names[player_name]
@@ -0,0 +1,354 @@
+import mmap
+import os
+import struct
+import tempfile
+import threading
+
+import redis
+
+from mech.mania.starter_pack.domain.memory.redis_connection import RedisConnection
+
+
+class BackendError(Exception):
+    """
+    A backend could not read or write the data
+    """
+
+
+class MemoryBackend:
+    """
+    Where a MemoryObject keeps its data, under one key: either one blob of bytes (BLOB_STORAGE) or a set of named
+    fields of bytes (HASH_STORAGE). Reads return bytes-like objects that are only valid until the next call to the
+    backend. Methods raise BackendError when the data cannot be read or written.
+
+    The backends other than Redis are always available and never call on_reconnect.
+    """
+    def is_available(self):
+        """
+        @return Whether the data can be read and written right now. Never blocks.
+        """
+        return True
+
+    def connect(self, force=False):
+        """
+        Gets the backend ready on the calling thread, e.g. before reading the data for the first time
+
+        @param force: Try even if an attempt failed too recently
+        @return Whether the backend is available
+        """
+        return True
+
+    def add_listener(self, listener):
+        """
+        @param listener: An object whose on_reconnect() is called when the backend becomes available again
+        """
+
+    def remove_listener(self, listener):
+        pass
+
+    def read(self):
+        """
+        @return The blob, or None if there is none
+        """
+        raise NotImplementedError
+
+    def write(self, data):
+        raise NotImplementedError
+
+    def holds_blob(self):
+        """
+        @return Whether the data is still a blob, to be migrated before fields are used
+        """
+        raise NotImplementedError
+
+    def read_field(self, field):
+        """
+        @return The field's bytes, or None if there is no such field
+        """
+        raise NotImplementedError
+
+    def write_fields(self, fields, removed):
+        """
+        @param fields: {field: bytes} to add or replace
+        @param removed: Fields to delete
+        """
+        raise NotImplementedError
+
+    def replace_with_fields(self, fields):
+        """
+        Deletes the blob and writes the given fields instead, at once
+        """
+        raise NotImplementedError
+
+    def adopt(self, key):
+        """
+        Moves the data saved under another key (blob or fields) to this backend's key, unless it already holds
+        data
+
+        @return Whether data was moved
+        """
+        raise NotImplementedError
+
+
+class RedisBackend(MemoryBackend):
+    """
+    A Redis string (blob) or hash (fields) at the key, through the process's shared RedisConnection. Changed fields
+    are written in one pipeline.
+    """
+    def __init__(self, key, host, port, password=None):
+        self.key = key
+        self.connection = RedisConnection.get(host, port, password)
+
+    def is_available(self):
+        # If Redis is unreachable, a reconnection attempt is started in the background when one is due
+        return self.connection.get_client() is not None
+
+    def connect(self, force=False):
+        return self.connection.connect(force=force)
+
+    def add_listener(self, listener):
+        self.connection.add_listener(listener)
+
+    def remove_listener(self, listener):
+        self.connection.remove_listener(listener)
+
+    def read(self):
+        return self.call(lambda client: client.get(self.key))
+
+    def write(self, data):
+        self.call(lambda client: client.set(self.key, data))
+
+    def holds_blob(self):
+        return self.call(lambda client: client.type(self.key)) == b'string'
+
+    def read_field(self, field):
+        return self.call(lambda client: client.hget(self.key, field))
+
+    def write_fields(self, fields, removed):
+        def send(client):
+            pipeline = client.pipeline(transaction=False)
+            if fields:
+                pipeline.hset(self.key, mapping=fields)
+            if removed:
+                pipeline.hdel(self.key, *removed)
+            pipeline.execute()
+        self.call(send)
+
+    def replace_with_fields(self, fields):
+        def send(client):
+            transaction = client.pipeline(transaction=True)
+            transaction.delete(self.key)
+            if fields:
+                transaction.hset(self.key, mapping=fields)
+            transaction.execute()
+        self.call(send)
+
+    def adopt(self, key):
+        def send(client):
+            try:
+                return bool(client.renamenx(key, self.key))
+            except redis.ResponseError:
+                # There is no data under key
+                return False
+        return self.call(send)
+
+    def call(self, command):
+        try:
+            return command(self.connection.client)
+        except (redis.ConnectionError, redis.TimeoutError) as e:
+            self.connection.connection_lost()
+            raise BackendError(str(e)) from e
+        except redis.RedisError as e:
+            # e.g. a key of the wrong type, which says nothing about the connection
+            raise BackendError(str(e)) from e
+
+
+class DictBackend(MemoryBackend):
+    """
+    Keeps the data in the process, in STORE, so it outlives the MemoryObject (as with Redis) but not the process.
+    Meant for benchmarks, replays and local runs without Redis.
+    """
+    STORE = {}
+    STORE_LOCK = threading.Lock()
+
+    def __init__(self, key):
+        self.key = key
+
+    def read(self):
+        data = self.STORE.get(self.key)
+        return data if isinstance(data, bytes) else None
+
+    def write(self, data):
+        self.STORE[self.key] = bytes(data)
+
+    def holds_blob(self):
+        return isinstance(self.STORE.get(self.key), bytes)
+
+    def read_field(self, field):
+        fields = self.STORE.get(self.key)
+        return fields.get(field) if isinstance(fields, dict) else None
+
+    def write_fields(self, fields, removed):
+        with self.STORE_LOCK:
+            stored = self.STORE.get(self.key)
+            if not isinstance(stored, dict):
+                stored = self.STORE[self.key] = {}
+            stored.update(fields)
+            for field in removed:
+                stored.pop(field, None)
+
+    def replace_with_fields(self, fields):
+        self.STORE[self.key] = dict(fields)
+
+    def adopt(self, key):
+        with self.STORE_LOCK:
+            if self.key in self.STORE or key not in self.STORE:
+                return False
+            self.STORE[self.key] = self.STORE.pop(key)
+            return True
+
+
+class FileBackend(MemoryBackend):
+    """
+    Keeps the data in files of a directory, read through memory maps: the blob in <key>.blob, the fields in
+    <key>.fields as a sequence of (length, name, length, value) records. A write replaces the whole file atomically,
+    so every save rewrites all fields: with HASH_STORAGE a save costs the size of all the data, not only of the
+    changed keys as with Redis. Reads cost no copy. Data survives the process, without Redis.
+
+    The fields are read once and kept until the fields file changes; its inode, modification time and size are
+    checked before each use, so that a file replaced by another process is read again. Two processes writing the
+    same key still overwrite each other's changes.
+    """
+    LENGTH = struct.Struct("<I")
+
+    def __init__(self, key, directory):
+        self.directory = directory
+        self.blob_path = os.path.join(directory, key + ".blob")
+        self.fields_path = os.path.join(directory, key + ".fields")
+        self.mapped = None
+        # (inode, modification time, size) of the file mapped
+        self.mapped_stat = None
+        # {field: memoryview of its value in self.mapped}, read from the fields file on first use
+        self.fields = None
+        # The flusher thread may write while the strategy reads
+        self.lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+
+    def read(self):
+        with self.lock:
+            return self.map(self.blob_path)
+
+    def write(self, data):
+        with self.lock:
+            self.replace(self.blob_path, data)
+
+    def holds_blob(self):
+        return os.path.exists(self.blob_path)
+
+    def read_field(self, field):
+        with self.lock:
+            return self.get_fields().get(field)
+
+    def write_fields(self, fields, removed):
+        with self.lock:
+            stored = {field: bytes(value) for field, value in self.get_fields().items() if field not in removed}
+            stored.update(fields)
+            self.write_all_fields(stored)
+
+    def replace_with_fields(self, fields):
+        with self.lock:
+            self.write_all_fields(fields)
+            os.remove(self.blob_path)
+
+    def adopt(self, key):
+        paths = [(os.path.join(self.directory, key + ".blob"), self.blob_path),
+                 (os.path.join(self.directory, key + ".fields"), self.fields_path)]
+        with self.lock:
+            if any(os.path.exists(path) for old_path, path in paths):
+                return False
+            moved = False
+            try:
+                for old_path, path in paths:
+                    if os.path.exists(old_path):
+                        os.rename(old_path, path)
+                        moved = True
+            except OSError as e:
+                raise BackendError(str(e)) from e
+            self.unmap()
+            return moved
+
+    def get_fields(self):
+        if self.fields is not None and self.fields_changed():
+            self.unmap()
+        if self.fields is None:
+            data = self.map(self.fields_path)
+            fields = {}
+            pos = 0
+            while data is not None and pos < len(data):
+                length, = self.LENGTH.unpack_from(data, pos)
+                name = str(data[pos + 4:pos + 4 + length], "utf-8")
+                pos += 4 + length
+                length, = self.LENGTH.unpack_from(data, pos)
+                fields[name] = data[pos + 4:pos + 4 + length]
+                pos += 4 + length
+            self.fields = fields
+        return self.fields
+
+    def fields_changed(self):
+        """
+        @return Whether the fields file was replaced or removed since self.fields was read from it
+        """
+        try:
+            stat = os.stat(self.fields_path)
+        except FileNotFoundError:
+            return self.mapped_stat is not None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size) != self.mapped_stat
+
+    def write_all_fields(self, fields):
+        records = bytearray()
+        for field, value in fields.items():
+            name = field.encode("utf-8")
+            records += self.LENGTH.pack(len(name)) + name + self.LENGTH.pack(len(value))
+            records += value
+        self.replace(self.fields_path, records)
+
+    def map(self, path):
+        """
+        @return A memoryview of the whole file, valid until the file is mapped again, or None if it does not exist
+        """
+        self.unmap()
+        try:
+            with open(path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                self.mapped_stat = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+                if stat.st_size == 0:
+                    return memoryview(b"")
+                self.mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+        return memoryview(self.mapped)
+
+    def unmap(self):
+        self.fields = None
+        self.mapped_stat = None
+        if self.mapped is not None:
+            try:
+                self.mapped.close()
+            except BufferError:
+                # A view of it is still referenced; the mapping is released with the last one
+                pass
+            self.mapped = None
+
+    def replace(self, path, data):
+        try:
+            descriptor, temporary = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(descriptor, "wb") as f:
+                f.write(data)
+            self.unmap()
+            os.replace(temporary, path)
+        except OSError as e:
+            raise BackendError(str(e)) from e
+
+
+# Backends selectable with MemoryObject(backend=...) or the MEMORY_BACKEND environment variable
+BACKENDS = ("redis", "dict", "file")
@@ -1,8 +1,12 @@
-import redis
-import json
+import copy
 import os
+import threading
 
+import numpy as np
+
+from mech.mania.starter_pack.domain.memory.backends import BACKENDS, BackendError, DictBackend, FileBackend, RedisBackend
 from mech.mania.starter_pack.domain.memory.set_value_result import SetValueResult
+from mech.mania.starter_pack.domain.memory.value_encoding import decode_value, encode_value, is_encodable
 
 
 class MemoryObject:
@@ -11,11 +15,20 @@ class MemoryObject:
     DEFAULT_INT = 0
     DEFAULT_BOOLEAN = False
 
+    DEFAULT_LIST = []
+    DEFAULT_DICT = {}
+    DEFAULT_ARRAY = np.zeros(0)
+
+    # Values may also be lists, dicts (with bool, int, float or str keys) and NumPy arrays of numbers or booleans,
+    # nested in any way; see value_encoding. A value changed in place must be set again to be saved.
     DEFAULTS = {
         bool: DEFAULT_BOOLEAN,
         int: DEFAULT_INT,
         float: DEFAULT_FLOAT, 
-        str: DEFAULT_STRING
+        str: DEFAULT_STRING,
+        list: DEFAULT_LIST,
+        dict: DEFAULT_DICT,
+        np.ndarray: DEFAULT_ARRAY
     }
 
     TARGET_ENGINE = ''
@@ -25,34 +38,111 @@ class MemoryObject:
     PORT = ''
 
     USER_DATA_KEY = ''
+    LEGACY_DATA_KEY = None
+
+    # BLOB_STORAGE keeps all user data as one encoded dict under USER_DATA_KEY, rewritten and read whole.
+    # HASH_STORAGE keeps every key as a field under USER_DATA_KEY (a Redis hash), each value encoded alone: only
+    # changed fields are written, and each field is read the first time its key is used.
+    BLOB_STORAGE = "blob"
+    HASH_STORAGE = "hash"
 
-    REDIS_CONNECTION = None
     user_data = {}
 
-    def __init__(self, target_engine = None, team_name = None, host = None, port = None, password = None):
-        self.TARGET_ENGINE = target_engine if target_engine else os.getenv("TARGET_ENGINE")
-        self.TEAM_NAME = team_name if team_name else os.getenv("TEAM_NAME")
+    DEFAULT_PORT = 6379
+    DEFAULT_DIRECTORY = "memory"
+
+    def __init__(self, target_engine = None, team_name = None, host = None, port = None, password = None, player_name = None, flush_interval = None, storage = None, backend = None, directory = None):
+        """
+        @param flush_interval: Seconds between background saves in write-behind mode, see set_value. Defaults to
+        the MEMORY_FLUSH_INTERVAL environment variable; if neither is set, every set_value saves right away.
+        @param storage: BLOB_STORAGE or HASH_STORAGE, defaults to the MEMORY_STORAGE environment variable, then to
+        BLOB_STORAGE. Data saved as a blob is migrated the first time it is opened with HASH_STORAGE.
+        @param backend: Where the data is kept, one of backends.BACKENDS: "redis", "dict" (in the process, for
+        benchmarks and offline runs) or "file" (memory-mapped files in `directory`). Defaults to the MEMORY_BACKEND
+        environment variable, then to "redis".
+        @param directory: Directory of the "file" backend, defaults to the MEMORY_DIRECTORY environment variable,
+        then to DEFAULT_DIRECTORY
+        """
+        self.TARGET_ENGINE = target_engine if target_engine else os.getenv("TARGET_ENGINE", "")
+        self.TEAM_NAME = team_name if team_name else os.getenv("TEAM_NAME", "")
         self.HOST = host if host else os.getenv("REDIS_HOST")
-        self.PORT = port if port else int(os.getenv("REDIS_PORT"))
+        self.PORT = port if port else int(os.getenv("REDIS_PORT", self.DEFAULT_PORT))
         self.PASSWORD = password if password else os.getenv("REDIS_PASSWORD")
         
         self.USER_DATA_KEY = f'{self.TEAM_NAME.lower().replace(" ", "_")}_{self.TARGET_ENGINE}'
-
+        # Data saved before keys were per player, moved to the player's key on first read if that one is empty
+        self.LEGACY_DATA_KEY = None
+        if player_name:
+            # Bots served by the same process keep separate data
+            self.LEGACY_DATA_KEY = self.USER_DATA_KEY
+            self.USER_DATA_KEY += f'_{player_name.lower().replace(" ", "_")}'
+
+        if flush_interval is None and os.getenv("MEMORY_FLUSH_INTERVAL"):
+            flush_interval = float(os.getenv("MEMORY_FLUSH_INTERVAL"))
+        self.flush_interval = flush_interval
+
+        self.storage = storage if storage else os.getenv("MEMORY_STORAGE", self.BLOB_STORAGE)
+        if self.storage not in (self.BLOB_STORAGE, self.HASH_STORAGE):
+            raise ValueError(f"Unknown memory storage '{self.storage}', expected one of: {self.BLOB_STORAGE}, {self.HASH_STORAGE}")
+        # Keys read from (or written to) the hash so far; with BLOB_STORAGE every key is loaded by fetch_data
+        self.loaded_keys = set()
+        self.user_data = {}
+        # Whether the saved data was read (and migrated) yet; nothing is saved before, so as not to overwrite it
+        self.fetched = False
+
+        # Guards user_data and dirty_keys against the flusher thread; save_lock keeps saves in order
+        self.lock = threading.RLock()
+        self.save_lock = threading.Lock()
+        self.dirty_keys = set()
+        self.flusher = None
+        self.flush_requested = threading.Event()
+        self.closed = False
+
+        backend = backend if backend else os.getenv("MEMORY_BACKEND", "redis")
+        if backend == "redis":
+            self.backend = RedisBackend(self.USER_DATA_KEY, self.HOST, self.PORT, self.PASSWORD)
+        elif backend == "dict":
+            self.backend = DictBackend(self.USER_DATA_KEY)
+        elif backend == "file":
+            directory = directory if directory else os.getenv("MEMORY_DIRECTORY", self.DEFAULT_DIRECTORY)
+            self.backend = FileBackend(self.USER_DATA_KEY, directory)
+        else:
+            raise ValueError(f"Unknown memory backend '{backend}', expected one of: {', '.join(BACKENDS)}")
+
+        # Keys written while the backend is unavailable (Redis unreachable) stay dirty and are saved by
+        # on_reconnect once it is back. Registered first so that a connection made meanwhile is not missed.
+        self.backend.add_listener(self)
         self.initialize()
 
-    def set_value(self, key, value):
-        if not self.is_connected():
-            self.initialize()
+    def is_write_behind(self):
+        # Once closed there is no flusher anymore: writes made after save_and_close, e.g. by a turn still in
+        # progress, are saved right away
+        return self.flush_interval is not None and not self.closed
 
-        if not self.is_connected():
-            return SetValueResult.REDIS_NOT_CONNECTED
+    def is_hash_storage(self):
+        return self.storage == self.HASH_STORAGE
 
+    def set_value(self, key, value):
+        """
+        @return REDIS_NOT_CONNECTED if the backend is unavailable: the value is kept and saved once it is back
+        """
         if not self.is_valid_value(value):
             return SetValueResult.INVALID_OBJECT_TYPE
 
-        self.user_data[key] = value
+        with self.lock:
+            self.user_data[key] = value
+            self.loaded_keys.add(key)
+            self.dirty_keys.add(key)
 
-        self.save_data()
+            if self.is_write_behind():
+                # Saved by the flusher thread, at the latest flush_interval seconds from now or at the end of the turn
+                self.start_flusher()
+
+        if not self.is_write_behind():
+            self.save_data()
+
+        if not self.is_connected():
+            return SetValueResult.REDIS_NOT_CONNECTED
 
         return SetValueResult.OPERATION_SUCCESS
 
@@ -60,88 +150,215 @@ class MemoryObject:
         if data_type not in self.DEFAULTS:
             return (None, False)
 
+        self.load_key(key)
         if key not in self.user_data:            
-            return (self.DEFAULTS[data_type], False)
+            return (self.get_default(data_type), False)
 
         value = self.user_data[key]
         return (value, isinstance(value, data_type))
 
     def remove_key(self, key):
+        self.load_key(key)
         if key not in self.user_data:
             return False
 
-        value = self.user_data[key]
+        with self.lock:
+            del self.user_data[key]
+            self.dirty_keys.add(key)
+            if self.is_write_behind():
+                self.start_flusher()
+                return True
 
-        del self.user_data[key]
+        if self.is_hash_storage():
+            self.save_data()
 
         return True
 
+    def load_key(self, key):
+        """
+        Reads the saved data if the backend was not available before but is now, then the key's field from the
+        hash the first time the key is used (HASH_STORAGE only)
+        """
+        if not self.fetched and self.is_connected():
+            self.fetch_data()
+
+        if not self.is_hash_storage() or key in self.loaded_keys or not self.fetched or not self.is_connected():
+            return
+
+        try:
+            data = self.backend.read_field(key)
+        except BackendError:
+            return
+
+        with self.lock:
+            # Unless set or removed meanwhile
+            if key not in self.loaded_keys:
+                if data is not None:
+                    self.user_data[key] = decode_value(data)
+                self.loaded_keys.add(key)
+
+    def start_flusher(self):
+        if self.flusher is None and not self.closed:
+            self.flusher = threading.Thread(target=self.run_flusher, name=f"flusher-{self.USER_DATA_KEY}", daemon=True)
+            self.flusher.start()
+
+    def end_turn(self):
+        """
+        Asks the flusher thread to save the keys written this turn now rather than at the next interval. Does not
+        wait for the save.
+        """
+        if self.dirty_keys:
+            self.flush_requested.set()
+
+    def run_flusher(self):
+        while not self.closed:
+            self.flush_requested.wait(self.flush_interval)
+            self.flush_requested.clear()
+            if not self.closed:
+                self.flush()
+
+    def flush(self):
+        """
+        Saves the data if any key changed since the last save
+
+        @return False if there were changes that could not be saved; they are kept for the next flush
+        """
+        with self.lock:
+            if not self.dirty_keys:
+                return True
+        return self.save_data()
+
+    @classmethod
+    def get_default(cls, data_type):
+        """
+        @return The value get_value returns for a missing key of the given type; a new one for mutable types
+        """
+        return copy.copy(cls.DEFAULTS[data_type])
+
     def is_valid_value(self, value):
-        return type(value) in self.DEFAULTS
+        return is_encodable(value)
+
+    def on_reconnect(self):
+        """
+        Called by the backend once it is available again (Redis reachable), on its reconnecting thread: reads the
+        saved data if it could not be read before, then saves the changes made meanwhile
+        """
+        if self.closed:
+            return
+        if not self.fetched:
+            self.fetch_data()
+        self.flush()
 
     def initialize(self):
-        self.get_connection()
-        user_data_status = self.fetch_data()
+        # Never blocks the turn creating this object: if the backend is not available yet (Redis not connected to
+        # yet, or unreachable), a connection attempt runs in the background and the data is read by on_reconnect,
+        # or by load_key if the object is used first
+        if self.is_connected():
+            self.fetch_data()
 
     def is_connected(self):
-        return bool(self.REDIS_CONNECTION)
+        """
+        Never blocks: if Redis is unreachable, a reconnection attempt is started in the background when one is due
+        """
+        return self.backend.is_available()
 
     def save_data(self):
-        if not self.is_connected():
+        if not self.fetched or not self.is_connected():
             return False
 
-        self.REDIS_CONNECTION.set(self.USER_DATA_KEY, json.dumps(self.user_data))
+        with self.save_lock:
+            with self.lock:
+                saved_keys = self.dirty_keys
+                self.dirty_keys = set()
+                if self.is_hash_storage():
+                    fields = {key: encode_value(self.user_data[key]) for key in saved_keys if key in self.user_data}
+                    removed = [key for key in saved_keys if key not in self.user_data]
+                else:
+                    data = encode_value(self.user_data)
+
+            try:
+                if not self.is_hash_storage():
+                    self.backend.write(data)
+                elif fields or removed:
+                    self.backend.write_fields(fields, removed)
+            except BackendError:
+                with self.lock:
+                    self.dirty_keys |= saved_keys
+                return False
 
         return True
 
     def close_connection(self):
-        if not self.is_connected():
-            return False
-
-        self.REDIS_CONNECTION.close()
+        # Redis connections are pooled and shared with the other MemoryObjects of the process
+        self.backend.remove_listener(self)
 
         return True
 
+    def stop_flusher(self):
+        self.closed = True
+        flusher = self.flusher
+        if flusher is not None and flusher is not threading.current_thread():
+            self.flush_requested.set()
+            flusher.join()
+
     def save_and_close(self):
+        # Stopped first, so that nothing written before this call is left unsaved
+        self.stop_flusher()
+
+        if self.backend.connect(force=True) and not self.fetched:
+            self.fetch_data()
+
         if not self.save_data():
             return False
 
         return self.close_connection()
 
     def fetch_data(self):
+        """
+        Reads the saved data (with HASH_STORAGE, only migrates it if needed). Keys changed before it could be read,
+        while the backend was unavailable, keep their new value.
+        """
         if not self.is_connected():
-            self.get_connection()
-
-        if not self.is_connected():
-            self.user_data = {}
             return False
 
-        redis_connection = self.REDIS_CONNECTION
-
-        data = redis_connection.get(self.USER_DATA_KEY)
+        try:
+            if self.LEGACY_DATA_KEY is not None:
+                self.backend.adopt(self.LEGACY_DATA_KEY)
+                self.LEGACY_DATA_KEY = None
+
+            if self.is_hash_storage():
+                # Keys are loaded when first used
+                if self.backend.holds_blob():
+                    self.migrate_blob()
+                self.fetched = True
+                return True
 
-        if not data:
-            self.user_data = {}
+            data = self.backend.read()
+            stored = decode_value(data) if data else {}
+        except BackendError:
             return False
 
-        data = data.decode('utf-8')
-        data = json.loads(data)
-        self.user_data = data
-
-        return True
+        with self.lock:
+            for key in self.dirty_keys:
+                if key in self.user_data:
+                    stored[key] = self.user_data[key]
+                else:
+                    stored.pop(key, None)
+            self.user_data = stored
+            self.fetched = True
+
+        return bool(data)
+
+    def migrate_blob(self):
+        """
+        Replaces user data saved by BLOB_STORAGE with a hash holding the same keys and values
+        """
+        data = self.backend.read()
+        user_data = decode_value(data) if data else {}
+        self.backend.replace_with_fields({key: encode_value(value) for key, value in user_data.items()})
 
     def get_connection(self):
-        try:
-            connection = redis.Redis(host=self.HOST, port=self.PORT, socket_connect_timeout=1, password=self.PASSWORD)
-
-            ping = connection.ping()
-
-            if ping:
-                self.REDIS_CONNECTION = connection
-                return True
-
-            self.REDIS_CONNECTION = None
-            return False
-        except Exception:
-            self.REDIS_CONNECTION = None
-            return False
\ No newline at end of file
+        """
+        Connects on the calling thread, unless a failed attempt was made too recently
+        """
+        return self.backend.connect()
@@ -0,0 +1,150 @@
+import threading
+import time
+import traceback
+import weakref
+
+import redis
+
+
+class RedisConnection:
+    """
+    A pooled Redis client shared by every MemoryObject of the process that uses the same server, which reconnects
+    in the background. While Redis is unreachable get_client() returns None right away instead of blocking a turn
+    on a connection attempt; attempts are made on a separate thread, waiting twice as long after each failure, from
+    INITIAL_BACKOFF up to MAX_BACKOFF seconds. Once the connection is back, every registered listener's
+    on_reconnect() is called on another background thread, e.g. to save the writes made meanwhile.
+
+        connection = RedisConnection.get(host, port, password)
+        client = connection.get_client()
+        if client is not None:
+            try:
+                client.set(key, value)
+            except redis.RedisError:
+                connection.connection_lost()
+    """
+    CONNECTIONS = {}
+    CONNECTIONS_LOCK = threading.Lock()
+
+    CONNECT_TIMEOUT = 1.0
+    SOCKET_TIMEOUT = 1.0
+    MAX_CONNECTIONS = 32
+
+    INITIAL_BACKOFF = 0.5
+    MAX_BACKOFF = 30.0
+
+    def __init__(self, host, port, password=None):
+        self.host = host
+        self.port = port
+        self.pool = redis.ConnectionPool(host=host, port=port, password=password,
+                                         socket_connect_timeout=self.CONNECT_TIMEOUT,
+                                         socket_timeout=self.SOCKET_TIMEOUT, max_connections=self.MAX_CONNECTIONS)
+        self.client = redis.Redis(connection_pool=self.pool)
+
+        self.lock = threading.Lock()
+        # Notified at the end of every connection attempt
+        self.attempt_done = threading.Condition(self.lock)
+        self.connected = False
+        self.connecting = False
+        self.backoff = self.INITIAL_BACKOFF
+        self.next_attempt = 0.0
+        self.listeners = weakref.WeakSet()
+
+    @classmethod
+    def get(cls, host, port, password=None):
+        """
+        @return The RedisConnection of the given server, created on first use
+        """
+        key = (host, port, password)
+        connection = cls.CONNECTIONS.get(key)
+        if connection is None:
+            with cls.CONNECTIONS_LOCK:
+                connection = cls.CONNECTIONS.get(key)
+                if connection is None:
+                    connection = cls.CONNECTIONS[key] = cls(host, port, password)
+        return connection
+
+    def connect(self, force=False):
+        """
+        Tries to connect on the calling thread, e.g. when a MemoryObject is saved and closed
+
+        @param force: Try even if the backoff delay since the last failed attempt has not passed yet, and wait for
+        an attempt in progress (at most the socket timeouts) instead of giving up
+        @return Whether Redis is reachable
+        """
+        with self.lock:
+            while force and self.connecting:
+                self.attempt_done.wait()
+            if self.connected:
+                return True
+            if self.connecting or (not force and time.monotonic() < self.next_attempt):
+                return False
+            self.connecting = True
+        return self.attempt()
+
+    def get_client(self):
+        """
+        @return The client if Redis is reachable, otherwise None after starting a reconnection attempt in the
+        background if one is due. Never blocks.
+        """
+        with self.lock:
+            if self.connected:
+                return self.client
+            if self.connecting or time.monotonic() < self.next_attempt:
+                return None
+            self.connecting = True
+        threading.Thread(target=self.attempt, name=f"redis-reconnect-{self.host}:{self.port}", daemon=True).start()
+        return None
+
+    def is_connected(self):
+        return self.connected
+
+    def attempt(self):
+        try:
+            reachable = bool(self.client.ping())
+        except Exception:
+            # Any failure must end the attempt, or connect(force=True) would wait for it forever
+            reachable = False
+
+        with self.lock:
+            self.connecting = False
+            self.connected = reachable
+            if reachable:
+                self.backoff = self.INITIAL_BACKOFF
+            else:
+                self.next_attempt = time.monotonic() + self.backoff
+                self.backoff = min(self.backoff * 2, self.MAX_BACKOFF)
+            self.attempt_done.notify_all()
+            listeners = list(self.listeners) if reachable else []
+
+        if listeners:
+            # Each listener may make several round trips; a forced connect() must not wait for all of them
+            threading.Thread(target=self.notify, args=(listeners,), name=f"redis-reconnected-{self.host}:{self.port}",
+                             daemon=True).start()
+        return reachable
+
+    def notify(self, listeners):
+        for listener in listeners:
+            try:
+                listener.on_reconnect()
+            except Exception:
+                traceback.print_exc()
+
+    def connection_lost(self):
+        """
+        Called after a command failed: get_client() returns None until a reconnection attempt succeeds
+        """
+        with self.lock:
+            if self.connected:
+                self.connected = False
+                self.next_attempt = time.monotonic()
+
+    def add_listener(self, listener):
+        """
+        @param listener: An object with an on_reconnect() method, held weakly
+        """
+        with self.lock:
+            self.listeners.add(listener)
+
+    def remove_listener(self, listener):
+        with self.lock:
+            self.listeners.discard(listener)
@@ -0,0 +1,203 @@
+import json
+import struct
+
+import numpy as np
+
+# Every encoded value starts with one of these tags, all below 0x20. JSON text, which MemoryObject wrote before,
+# always starts with a printable character, so decode_value can still read it.
+FALSE = 0x01
+TRUE = 0x02
+INT = 0x03
+BIG_INT = 0x04
+FLOAT = 0x05
+STRING = 0x06
+LIST = 0x07
+DICT = 0x08
+ARRAY = 0x09
+# A list of only ints, or only floats, stored like a one-dimensional array (ints in the narrowest integer type
+# holding them all), and decoded back to a list
+NUMBER_LIST = 0x0a
+
+INT64 = struct.Struct("<q")
+FLOAT64 = struct.Struct("<d")
+LENGTH = struct.Struct("<I")
+
+SCALAR_TYPES = (bool, int, float, str)
+FLOAT64_DTYPE = np.dtype("<f8")
+INT_DTYPES = (np.dtype("<i1"), np.dtype("<i2"), np.dtype("<i4"), np.dtype("<i8"))
+
+
+def is_encodable(value):
+    """
+    @return Whether value is a bool, int, float or str, a list of encodable values, a dict from scalars to encodable
+    values or a NumPy array of numbers or booleans
+    """
+    value_type = type(value)
+    if value_type in SCALAR_TYPES:
+        return True
+    if value_type is list:
+        return all(is_encodable(item) for item in value)
+    if value_type is dict:
+        return all(type(key) in SCALAR_TYPES and is_encodable(item) for key, item in value.items())
+    if value_type is np.ndarray:
+        return value.dtype.kind in "biuf"
+    return False
+
+
+def encode_value(value):
+    """
+    @param value: An encodable value, see is_encodable
+    @return Its compact binary encoding: a tag byte, then fixed-size little-endian numbers, length-prefixed UTF-8
+    strings, or the raw bytes of an array after its dtype and shape
+    """
+    out = bytearray()
+    write_value(out, value)
+    return bytes(out)
+
+
+def write_value(out, value):
+    value_type = type(value)
+    if value_type is bool:
+        out.append(TRUE if value else FALSE)
+    elif value_type is int:
+        if -2 ** 63 <= value < 2 ** 63:
+            out.append(INT)
+            out += INT64.pack(value)
+        else:
+            out.append(BIG_INT)
+            write_string(out, str(value))
+    elif value_type is float:
+        out.append(FLOAT)
+        out += FLOAT64.pack(value)
+    elif value_type is str:
+        out.append(STRING)
+        write_string(out, value)
+    elif value_type is list and number_list_dtype(value) is not None:
+        out.append(NUMBER_LIST)
+        write_array(out, np.array(value, dtype=number_list_dtype(value)))
+    elif value_type is list:
+        out.append(LIST)
+        out += LENGTH.pack(len(value))
+        for item in value:
+            write_value(out, item)
+    elif value_type is dict:
+        out.append(DICT)
+        out += LENGTH.pack(len(value))
+        for key, item in value.items():
+            write_value(out, key)
+            write_value(out, item)
+    elif value_type is np.ndarray:
+        out.append(ARRAY)
+        write_array(out, value)
+    else:
+        raise TypeError(f"Cannot encode a value of type {value_type.__name__}")
+
+
+def number_list_dtype(items):
+    """
+    @return The dtype a list is stored with as a NUMBER_LIST, or None if it is not one
+    """
+    if not items:
+        return None
+    item_type = type(items[0])
+    if item_type is float:
+        return FLOAT64_DTYPE if all(type(item) is float for item in items) else None
+    if item_type is not int or not all(type(item) is int for item in items):
+        return None
+    low, high = min(items), max(items)
+    for dtype in INT_DTYPES:
+        limits = np.iinfo(dtype)
+        if limits.min <= low and high <= limits.max:
+            return dtype
+    return None
+
+
+def write_array(out, array):
+    write_string(out, array.dtype.str)
+    out.append(array.ndim)
+    for size in array.shape:
+        out += LENGTH.pack(size)
+    out += np.ascontiguousarray(array).tobytes()
+
+
+def write_string(out, value):
+    data = value.encode("utf-8")
+    out += LENGTH.pack(len(data))
+    out += data
+
+
+def decode_value(data):
+    """
+    @param data: What encode_value returned, or the JSON text of a bool, int, float, str, list or dict
+    @return The value; arrays are writable copies
+    """
+    if data[:1] and data[0] >= 0x20:
+        return json.loads(bytes(data))
+    value, end = read_value(memoryview(data), 0)
+    return value
+
+
+def read_value(data, pos):
+    """
+    @return The value encoded at data[pos:] and the position right after it
+    """
+    tag = data[pos]
+    pos += 1
+    if tag == FALSE:
+        return False, pos
+    if tag == TRUE:
+        return True, pos
+    if tag == INT:
+        return INT64.unpack_from(data, pos)[0], pos + INT64.size
+    if tag == BIG_INT:
+        text, pos = read_string(data, pos)
+        return int(text), pos
+    if tag == FLOAT:
+        return FLOAT64.unpack_from(data, pos)[0], pos + FLOAT64.size
+    if tag == STRING:
+        return read_string(data, pos)
+    if tag == LIST:
+        count, = LENGTH.unpack_from(data, pos)
+        pos += LENGTH.size
+        items = []
+        for _ in range(count):
+            item, pos = read_value(data, pos)
+            items.append(item)
+        return items, pos
+    if tag == DICT:
+        count, = LENGTH.unpack_from(data, pos)
+        pos += LENGTH.size
+        items = {}
+        for _ in range(count):
+            key, pos = read_value(data, pos)
+            items[key], pos = read_value(data, pos)
+        return items, pos
+    if tag == ARRAY:
+        array, pos = read_array(data, pos)
+        return array.copy(), pos
+    if tag == NUMBER_LIST:
+        array, pos = read_array(data, pos)
+        return array.tolist(), pos
+    raise ValueError(f"Unknown value tag {tag:#x}")
+
+
+def read_array(data, pos):
+    """
+    @return A read-only array over data and the position right after it
+    """
+    dtype, pos = read_string(data, pos)
+    dtype = np.dtype(dtype)
+    ndim = data[pos]
+    pos += 1
+    shape = []
+    for _ in range(ndim):
+        shape.append(LENGTH.unpack_from(data, pos)[0])
+        pos += LENGTH.size
+    size = dtype.itemsize * int(np.prod(shape, dtype=np.int64))
+    return np.frombuffer(data[pos:pos + size], dtype=dtype).reshape(shape), pos + size
+
+
+def read_string(data, pos):
+    length, = LENGTH.unpack_from(data, pos)
+    pos += LENGTH.size
+    return str(data[pos:pos + length], "utf-8"), pos + length
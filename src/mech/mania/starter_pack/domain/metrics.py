@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class Histogram:
+    """
+    Durations observed under one span name. Percentiles are computed over the most recent `window` observations
+    (all of them if window is None); the count and sum cover every observation.
+    """
+    def __init__(self, window=4096):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, p):
+        """
+        @param p: The percentile, between 0 and 100
+        @return The nearest-rank percentile of the recent observations, or 0.0 if there are none
+        """
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        rank = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered))) - 1))
+        return ordered[rank]
+
+
+class Metrics:
+    """
+    Thread-safe named counters and span duration histograms describing how the bot is doing, e.g. how many turns
+    missed their deadline or how long each API call takes.
+
+        with METRICS.span("make_decision"):
+            decision = strategy.make_decision(player_name, game_state)
+    """
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self, window=4096):
+        """
+        @param window: How many recent durations of each span percentiles are computed over, None for all of them
+        """
+        self.window = window
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def increment(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def get_counter(self, name):
+        with self.lock:
+            return self.counters.get(name, 0)
+
+    def get_counters(self):
+        """
+        @return A copy of every counter by name
+        """
+        with self.lock:
+            return dict(self.counters)
+
+    def observe(self, name, seconds):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(self.window)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, name):
+        """
+        Times the body of the with statement and records the duration under the given name, even if it raises
+        """
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - begin)
+
+    def get_percentiles(self, name):
+        """
+        @return {percentile: seconds} for PERCENTILES over the recent durations of the span, or None if the span
+        was never recorded
+        """
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                return None
+            return {p: histogram.percentile(p) for p in self.PERCENTILES}
+
+    def render(self):
+        """
+        @return Every counter and span in the Prometheus text exposition format
+        """
+        lines = []
+        with self.lock:
+            for name in sorted(self.counters):
+                lines.append(f"{name} {self.counters[name]}")
+
+            if self.histograms:
+                lines.append("# TYPE span_seconds summary")
+            for name in sorted(self.histograms):
+                histogram = self.histograms[name]
+                for p in self.PERCENTILES:
+                    lines.append(f'span_seconds{{span="{name}",quantile="{p / 100}"}} {histogram.percentile(p):.6f}')
+                lines.append(f'span_seconds_count{{span="{name}"}} {histogram.count}')
+                lines.append(f'span_seconds_sum{{span="{name}"}} {histogram.total:.6f}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self.lock:
+            self.counters = {}
+            self.histograms = {}
+
+
+# Shared by the servers and the strategy of this process
+METRICS = Metrics()
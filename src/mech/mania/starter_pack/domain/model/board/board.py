@@ -1,26 +1,32 @@
 from mech.mania.engine.domain.model import board_pb2
+from mech.mania.starter_pack.domain.model.board.terrain import Terrain, TERRAIN_CACHE
 from mech.mania.starter_pack.domain.model.board.tile import Tile
-from mech.mania.starter_pack.domain.model.characters.position import Position
+from mech.mania.starter_pack.domain.model.lazy import LazySequence
 
 
 class Board:
-    def __init__(self, proto_board: board_pb2.Board):
+    VOID = board_pb2.Tile.TileType.VOID
+    BLANK = board_pb2.Tile.TileType.BLANK
+    IMPASSIBLE = board_pb2.Tile.TileType.IMPASSIBLE
+    PORTAL = board_pb2.Tile.TileType.PORTAL
+
+    def __init__(self, proto_board: board_pb2.Board, board_id: str = None):
 
         self.proto_board = proto_board
+        self.board_id = board_id
 
         self.width = proto_board.width
         self.height = proto_board.height
-        self.grid = []
+        # Tiles are only wrapped once they are read
+        self.grid = LazySequence(self.width, self.build_column)
 
-        for x in range(self.width):
-            row = []
-            for y in range(self.height):
-                row.append(Tile(proto_board.grid[x * self.height + y]))
-            self.grid.append(row)
+        # Static terrain (tile types, portals, distance fields) comes from the process-wide cache when the board
+        # id is known, so it is only rebuilt when the layout changes. Tiles and their items are always read fresh.
+        self.terrain = None
 
-        self.portals = []
-        for i in range(len(proto_board.portals)):
-            self.portals.append(Position(proto_board.portals[i]))
+    def build_column(self, x):
+        offset = x * self.height
+        return LazySequence(self.height, lambda y: Tile(self.proto_board.grid[offset + y]))
 
     def get_grid(self):
         """
@@ -31,8 +37,38 @@ class Board:
     def get_tile_at(self, pos):
         return self.grid[pos.x][pos.y]
 
+    @property
+    def portals(self):
+        return self.get_portals()
+
+    def get_terrain(self):
+        if self.terrain is None:
+            if self.board_id is None:
+                self.terrain = Terrain.from_proto(self.proto_board)
+            else:
+                self.terrain = TERRAIN_CACHE.get_terrain(self.board_id, self.proto_board)
+        return self.terrain
+
     def get_portals(self):
-        return self.portals
+        return self.get_terrain().portals
+
+    def get_tile_types(self):
+        """
+        Returns a read-only numpy uint8 array where tile_types[X][Y] is the TileType value of the tile at (X, Y)
+        """
+        return self.get_terrain().tile_types
+
+    def get_passable_mask(self):
+        """
+        Returns a read-only numpy bool array that is True where a tile can be walked on (BLANK or PORTAL)
+        """
+        return self.get_terrain().get_passable_mask()
+
+    def get_portal_mask(self):
+        """
+        Returns a read-only numpy bool array that is True where a tile is a PORTAL
+        """
+        return self.get_terrain().get_portal_mask()
 
     def build_proto_class(self):
         return self.proto_board
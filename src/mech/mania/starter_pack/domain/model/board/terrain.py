@@ -0,0 +1,251 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from mech.mania.engine.domain.model import board_pb2
+from mech.mania.starter_pack.domain.model.characters.position import Position
+from mech.mania.starter_pack.domain.path_finding import bfs_distances, multi_source_bfs
+
+
+class PortalTables:
+    """
+    Distances from every tile of a board to its closest portal, computed with one multi-source BFS.
+    Flat lists are indexed by x * height + y; the numpy arrays are the same tables shaped (width, height).
+    """
+    def __init__(self, width, height, portals, passable):
+        self.width = width
+        self.height = height
+        self.portals = []
+        sources = []
+        for portal in portals:
+            if 0 <= portal.x < width and 0 <= portal.y < height:
+                self.portals.append(portal)
+                sources.append(portal.x * height + portal.y)
+
+        self.distances, self.nearest, self.next_hop = multi_source_bfs(passable, width, height, sources)
+
+        self.distance_array = np.array(self.distances, dtype=np.int32).reshape(width, height)
+        self.nearest_array = np.array(self.nearest, dtype=np.int16).reshape(width, height)
+        self.distance_array.flags.writeable = False
+        self.nearest_array.flags.writeable = False
+
+    def entry_index(self, x, y):
+        """
+        Returns the flat index of (x, y) if a portal can be reached from it. Otherwise (e.g. when standing on a tile
+        that cannot be walked on) returns its neighbor closest to a portal, or -1 if there is none.
+        """
+        index = x * self.height + y
+        if self.distances[index] != -1:
+            return index
+
+        best = -1
+        for neighbor, in_bounds in ((index + self.height, x + 1 < self.width), (index - self.height, x > 0),
+                                    (index + 1, y + 1 < self.height), (index - 1, y > 0)):
+            if in_bounds and self.distances[neighbor] != -1:
+                if best == -1 or self.distances[neighbor] < self.distances[best]:
+                    best = neighbor
+        return best
+
+    def distance_to_portal(self, x, y):
+        """
+        @return The walking distance from (x, y) to the closest portal, or -1 if no portal can be reached
+        """
+        entry = self.entry_index(x, y)
+        if entry == -1:
+            return -1
+        return self.distances[entry] + (0 if entry == x * self.height + y else 1)
+
+    def closest_portal(self, x, y):
+        """
+        @return The Position of the portal closest to (x, y), or None if no portal can be reached
+        """
+        entry = self.entry_index(x, y)
+        return None if entry == -1 else self.portals[self.nearest[entry]]
+
+    def next_step(self, x, y):
+        """
+        @return The (x, y) of the tile one step closer to the closest portal, or None at a portal or when unreachable
+        """
+        index = x * self.height + y
+        entry = self.entry_index(x, y)
+        if entry != index:
+            return None if entry == -1 else divmod(entry, self.height)
+        index = self.next_hop[index]
+        return None if index == -1 else divmod(index, self.height)
+
+
+class Terrain:
+    """
+    The static part of a board: tile types, portals and everything derived from them.
+    A Terrain is shared between turns for as long as the board's layout does not change.
+    """
+    MAX_DISTANCE_FIELDS = 64
+    # Boards with at most this many tiles can build a full all-pairs distance table (tiles^2 int16 entries)
+    ALL_PAIRS_MAX_TILES = 1024
+
+    def __init__(self, width, height, tile_types, portals):
+        self.width = width
+        self.height = height
+
+        tile_types.flags.writeable = False
+        self.tile_types = tile_types
+        self.portals = portals
+
+        self.passable_mask = None
+        self.portal_mask = None
+        self.passable = None
+        self.distance_fields = OrderedDict()
+        self.portal_tables = None
+        self.all_pairs = None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_proto(cls, proto_board: board_pb2.Board):
+        return cls(proto_board.width, proto_board.height, read_tile_types(proto_board), read_portals(proto_board))
+
+    def get_passable_mask(self):
+        if self.passable_mask is None:
+            passable_mask = (self.tile_types == board_pb2.Tile.TileType.BLANK) | \
+                            (self.tile_types == board_pb2.Tile.TileType.PORTAL)
+            passable_mask.flags.writeable = False
+            self.passable_mask = passable_mask
+        return self.passable_mask
+
+    def get_portal_mask(self):
+        if self.portal_mask is None:
+            portal_mask = self.tile_types == board_pb2.Tile.TileType.PORTAL
+            portal_mask.flags.writeable = False
+            self.portal_mask = portal_mask
+        return self.portal_mask
+
+    def get_passable(self):
+        """
+        Returns the passable mask as a flat list indexed by x * height + y, for pure Python searches
+        """
+        if self.passable is None:
+            self.passable = self.get_passable_mask().ravel().tolist()
+        return self.passable
+
+    def get_distance_field(self, x, y):
+        """
+        Returns a read-only numpy int32 array holding the walking distance from every tile to (x, y), or -1 where
+        (x, y) cannot be reached. Fields are cached per target and reused for as long as this terrain is.
+        """
+        return self.get_distances(x, y)[0]
+
+    def get_flat_distances(self, x, y):
+        """
+        Returns the same distances as get_distance_field as a flat list indexed by x * height + y
+        """
+        return self.get_distances(x, y)[1]
+
+    def get_portal_tables(self):
+        """
+        Returns the PortalTables of this terrain, built on first use
+        """
+        if self.portal_tables is None:
+            # Request threads may share this terrain; the tables are built once
+            with self.lock:
+                if self.portal_tables is None:
+                    self.portal_tables = PortalTables(self.width, self.height, self.portals, self.get_passable())
+        return self.portal_tables
+
+    def get_all_pairs_distances(self):
+        """
+        Returns a read-only numpy int16 array of shape (width * height, width * height) where [a][b] is the walking
+        distance between flat tile indices a and b (-1 if unreachable), or None if the board is too large
+        """
+        size = self.width * self.height
+        if size > self.ALL_PAIRS_MAX_TILES:
+            return None
+
+        if self.all_pairs is None:
+            with self.lock:
+                if self.all_pairs is None:
+                    passable = self.get_passable()
+                    all_pairs = np.full((size, size), -1, dtype=np.int16)
+                    for source in range(size):
+                        if passable[source]:
+                            all_pairs[source] = bfs_distances(passable, self.width, self.height, [source])
+                    all_pairs.flags.writeable = False
+                    self.all_pairs = all_pairs
+        return self.all_pairs
+
+    def get_distances(self, x, y):
+        key = (x, y)
+        with self.lock:
+            if key in self.distance_fields:
+                self.distance_fields.move_to_end(key)
+                return self.distance_fields[key]
+
+        distances = bfs_distances(self.get_passable(), self.width, self.height, [x * self.height + y])
+        distance_field = np.array(distances, dtype=np.int32).reshape(self.width, self.height)
+        distance_field.flags.writeable = False
+
+        with self.lock:
+            self.distance_fields[key] = (distance_field, distances)
+            if len(self.distance_fields) > self.MAX_DISTANCE_FIELDS:
+                self.distance_fields.popitem(last=False)
+        return distance_field, distances
+
+
+class TerrainCache:
+    """
+    Process-wide cache of Terrain objects keyed by board id. A cached terrain is reused while the fingerprint of
+    the board's tile-type layout and portals matches; otherwise it is rebuilt.
+    """
+    def __init__(self, max_boards=64):
+        self.max_boards = max_boards
+        self.boards = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_terrain(self, board_id, proto_board: board_pb2.Board):
+        tile_types = read_tile_types(proto_board)
+        fingerprint = layout_fingerprint(proto_board, tile_types)
+
+        with self.lock:
+            entry = self.boards.get(board_id)
+            if entry is not None and entry[0] == fingerprint:
+                self.boards.move_to_end(board_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        terrain = Terrain(proto_board.width, proto_board.height, tile_types, read_portals(proto_board))
+
+        with self.lock:
+            self.boards[board_id] = (fingerprint, terrain)
+            self.boards.move_to_end(board_id)
+            while len(self.boards) > self.max_boards:
+                self.boards.popitem(last=False)
+        return terrain
+
+    def clear(self):
+        with self.lock:
+            self.boards.clear()
+
+
+def read_tile_types(proto_board: board_pb2.Board):
+    grid = proto_board.grid
+    tile_types = np.fromiter((tile.tile_type for tile in grid), dtype=np.uint8, count=len(grid))
+    return tile_types.reshape(proto_board.width, proto_board.height)
+
+
+def read_portals(proto_board: board_pb2.Board):
+    return [Position(portal) for portal in proto_board.portals]
+
+
+def layout_fingerprint(proto_board: board_pb2.Board, tile_types):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.array([proto_board.width, proto_board.height], dtype=np.int64).tobytes())
+    digest.update(tile_types.tobytes())
+    for portal in proto_board.portals:
+        digest.update(f"{portal.board_id}:{portal.x}:{portal.y};".encode())
+    return digest.digest()
+
+
+TERRAIN_CACHE = TerrainCache()
@@ -13,20 +13,8 @@ class Tile:
 
         self.proto_tile = proto_tile
 
-        self.items = []
-        for item in proto_tile.items:
-            if item.HasField("clothes"):
-                self.items.append(Clothes(item.clothes))
-            elif item.HasField("hat"):
-                self.items.append(Hat(item.hat))
-            elif item.HasField("shoes"):
-                self.items.append(Shoes(item.shoes))
-            elif item.HasField("accessory"):
-                self.items.append(Accessory(item.accessory))
-            elif item.HasField("weapon"):
-                self.items.append(Weapon(item.weapon))
-            elif item.HasField("consumable"):
-                self.items.append(Consumable(item.consumable))
+        # Items are wrapped on the first call to get_items
+        self._items = None
 
         if proto_tile.tile_type == board_pb2.Tile.TileType.VOID:
             self.type = "VOID"
@@ -37,8 +25,27 @@ class Tile:
         elif proto_tile.tile_type == board_pb2.Tile.TileType.PORTAL:
             self.type = "PORTAL"
 
+    @property
+    def items(self):
+        return self.get_items()
+
     def get_items(self):
-        return self.items
+        if self._items is None:
+            self._items = []
+            for item in self.proto_tile.items:
+                if item.HasField("clothes"):
+                    self._items.append(Clothes(item.clothes))
+                elif item.HasField("hat"):
+                    self._items.append(Hat(item.hat))
+                elif item.HasField("shoes"):
+                    self._items.append(Shoes(item.shoes))
+                elif item.HasField("accessory"):
+                    self._items.append(Accessory(item.accessory))
+                elif item.HasField("weapon"):
+                    self._items.append(Weapon(item.weapon))
+                elif item.HasField("consumable"):
+                    self._items.append(Consumable(item.consumable))
+        return self._items
 
     def get_type(self):
         return self.type
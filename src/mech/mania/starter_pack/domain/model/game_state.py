@@ -2,6 +2,7 @@ from mech.mania.engine.domain.model import game_pb2
 from mech.mania.starter_pack.domain.model.board.board import Board
 from mech.mania.starter_pack.domain.model.characters.monster import Monster
 from mech.mania.starter_pack.domain.model.characters.player import Player
+from mech.mania.starter_pack.domain.model.lazy import LazyMapping
 
 
 class GameState:
@@ -11,18 +12,10 @@ class GameState:
 
         self.turn_num = game_state_proto.state_id
 
-        self.board_names = {}
-        for k, v in game_state_proto.board_names.items():
-            self.board_names[k] = Board(v)
-
-        self.player_names = {}
-        self.monster_names = {}
-
-        for k, v in game_state_proto.monster_names.items():
-            self.monster_names[k] = Monster(v)
-
-        for k, v in game_state_proto.player_names.items():
-            self.player_names[k] = Player(v)
+        # Boards, players and monsters are only wrapped once they are looked up
+        self.board_names = LazyMapping(game_state_proto.board_names, Board, pass_key=True)
+        self.player_names = LazyMapping(game_state_proto.player_names, Player)
+        self.monster_names = LazyMapping(game_state_proto.monster_names, Monster)
 
     def get_turn_num(self):
         return self.turn_num
@@ -46,7 +39,7 @@ class GameState:
         return {**self.player_names, **self.monster_names}
 
     def get_characters_on_board(self, board_id: str):
-        return self.get_monsters_on_board(board_id).extend(self.get_players_on_board(board_id))
+        return self.get_monsters_on_board(board_id) + self.get_players_on_board(board_id)
 
     def get_player(self, player_id: str):
         return None if player_id not in self.player_names else self.player_names[player_id]
@@ -58,7 +51,7 @@ class GameState:
         if board_id not in self.board_names:
             return []
 
-        return [player for player in self.player_names.values() if player.position.board_id == board_id]
+        return self.player_names.select(lambda player: player.character.position.board_id == board_id)
 
     def get_monster(self, monster_id: str):
         return None if monster_id not in self.monster_names else self.monster_names[monster_id]
@@ -70,7 +63,7 @@ class GameState:
         if board_id not in self.board_names:
             return []
 
-        return [monster for monster in self.monster_names.values() if monster.position.board_id == board_id]
+        return self.monster_names.select(lambda monster: monster.character.position.board_id == board_id)
 
         # for name, board in self.board_names.items():
         #     game_state_builder.board_names[name].width = board.width
@@ -0,0 +1,65 @@
+from collections.abc import Mapping, Sequence
+
+
+class LazyMapping(Mapping):
+    """
+    Read-only dict over a protobuf map that wraps each value the first time it is looked up.
+    If pass_key is set, wrap is called as wrap(value, key).
+    """
+    def __init__(self, proto_map, wrap, pass_key=False):
+        self.proto_map = proto_map
+        self.wrap = wrap
+        self.pass_key = pass_key
+        self.cache = {}
+
+    def __getitem__(self, key):
+        if key not in self.cache:
+            # Indexing a protobuf message map inserts missing keys, so check membership first
+            if key not in self.proto_map:
+                raise KeyError(key)
+            value = self.proto_map[key]
+            self.cache[key] = self.wrap(value, key) if self.pass_key else self.wrap(value)
+        return self.cache[key]
+
+    def __contains__(self, key):
+        return key in self.proto_map
+
+    def __iter__(self):
+        return iter(self.proto_map)
+
+    def __len__(self):
+        return len(self.proto_map)
+
+    def select(self, predicate):
+        """
+        @param predicate: A function taking the raw protobuf value
+        @return A list of wrapped values whose protobuf value satisfies the predicate; nothing else is wrapped
+        """
+        return [self[key] for key, proto in self.proto_map.items() if predicate(proto)]
+
+
+class LazySequence(Sequence):
+    """
+    Read-only list of a fixed length whose elements are built by wrap(index) the first time they are read
+    """
+    def __init__(self, length, wrap):
+        self.length = length
+        self.wrap = wrap
+        self.items = [None] * length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.length))]
+
+        if index < 0:
+            index += self.length
+        if index < 0 or index >= self.length:
+            raise IndexError("LazySequence index out of range")
+
+        item = self.items[index]
+        if item is None:
+            item = self.items[index] = self.wrap(index)
+        return item
+
+    def __len__(self):
+        return self.length
@@ -0,0 +1,182 @@
+from collections import deque
+
+from mech.mania.starter_pack.domain.model.characters.position import Position
+
+
+def bfs_distances(passable, width, height, sources):
+    """
+    Multi-source breadth first search over a flat grid indexed by x * height + y.
+
+    @param passable: A flat list that is True where a tile can be walked on
+    @param sources: Flat indices to measure distances from
+    @return A flat list holding the distance to the closest source, or -1 where no source can be reached
+    """
+    distances = [-1] * (width * height)
+    queue = deque()
+    for source in sources:
+        if distances[source] == -1:
+            distances[source] = 0
+            queue.append(source)
+
+    while queue:
+        current = queue.popleft()
+        step = distances[current] + 1
+        x, y = divmod(current, height)
+        if x + 1 < width:
+            neighbor = current + height
+            if passable[neighbor] and distances[neighbor] == -1:
+                distances[neighbor] = step
+                queue.append(neighbor)
+        if x > 0:
+            neighbor = current - height
+            if passable[neighbor] and distances[neighbor] == -1:
+                distances[neighbor] = step
+                queue.append(neighbor)
+        if y + 1 < height:
+            neighbor = current + 1
+            if passable[neighbor] and distances[neighbor] == -1:
+                distances[neighbor] = step
+                queue.append(neighbor)
+        if y > 0:
+            neighbor = current - 1
+            if passable[neighbor] and distances[neighbor] == -1:
+                distances[neighbor] = step
+                queue.append(neighbor)
+
+    return distances
+
+
+def multi_source_bfs(passable, width, height, sources):
+    """
+    Like bfs_distances, but also records which source is closest to each tile and the next tile to step onto.
+
+    @return A tuple of flat lists (distances, nearest, next_hop): nearest holds the index into sources of the
+    closest source and next_hop the flat index of the neighbor one step closer to it (-1 where not applicable)
+    """
+    size = width * height
+    distances = [-1] * size
+    nearest = [-1] * size
+    next_hop = [-1] * size
+    queue = deque()
+    for i, source in enumerate(sources):
+        if distances[source] == -1:
+            distances[source] = 0
+            nearest[source] = i
+            queue.append(source)
+
+    while queue:
+        current = queue.popleft()
+        step = distances[current] + 1
+        label = nearest[current]
+        x, y = divmod(current, height)
+        for neighbor, in_bounds in ((current + height, x + 1 < width), (current - height, x > 0),
+                                    (current + 1, y + 1 < height), (current - 1, y > 0)):
+            if in_bounds and passable[neighbor] and distances[neighbor] == -1:
+                distances[neighbor] = step
+                nearest[neighbor] = label
+                next_hop[neighbor] = current
+                queue.append(neighbor)
+
+    return distances, nearest, next_hop
+
+
+class PathFinder:
+    """
+    Local replacement for the engine's pathFinding endpoint. Works on a single Board:
+    BLANK and PORTAL tiles can be walked on, IMPASSIBLE and VOID tiles cannot.
+    """
+    def __init__(self, board):
+        self.board = board
+        self.terrain = board.get_terrain()
+        self.width = board.width
+        self.height = board.height
+
+        # Flat list indexed by x * height + y; plain list lookups are much faster than numpy scalar indexing
+        self.passable = self.terrain.get_passable()
+
+    def is_passable(self, x, y):
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return False
+        return self.passable[x * self.height + y]
+
+    def neighbors(self, index):
+        """
+        Yields the flat grid indices of the walkable tiles next to the given flat index
+        """
+        x, y = divmod(index, self.height)
+        if x + 1 < self.width and self.passable[index + self.height]:
+            yield index + self.height
+        if x > 0 and self.passable[index - self.height]:
+            yield index - self.height
+        if y + 1 < self.height and self.passable[index + 1]:
+            yield index + 1
+        if y > 0 and self.passable[index - 1]:
+            yield index - 1
+
+    def find_path(self, start, end):
+        """
+        Finds a shortest path from start to end on this board.
+
+        @param start: The position to start from
+        @param end: The position to end at
+        @return A list of Position objects from start (exclusive) to end (inclusive), or an empty list if
+        no path is possible. If end is on another board, the path leads to the closest portal instead.
+        """
+        if start.board_id != end.board_id:
+            return self.find_path_to_closest_portal(start)
+
+        if not self.is_passable(end.x, end.y) or not self.in_bounds(start):
+            return []
+
+        # The distance field towards end is cached on the terrain, so repeated queries to the same
+        # target only cost the walk back along the path
+        return self.descend(self.terrain.get_flat_distances(end.x, end.y), start)
+
+    def find_path_to_closest_portal(self, start):
+        """
+        @param start: The position to start from
+        @return A list of Position objects leading to the closest reachable portal on this board
+        """
+        if not self.in_bounds(start):
+            return []
+
+        portal_tables = self.terrain.get_portal_tables()
+        path = []
+        step = portal_tables.next_step(start.x, start.y)
+        while step is not None:
+            path.append(Position.create(step[0], step[1], start.board_id))
+            step = portal_tables.next_step(step[0], step[1])
+        return path
+
+    def in_bounds(self, pos):
+        return 0 <= pos.x < self.width and 0 <= pos.y < self.height
+
+    def descend(self, distances, start):
+        """
+        Walks from start to the tile at distance 0 by always stepping onto a neighbor one step closer.
+
+        @param distances: A flat distance field as returned by bfs_distances
+        """
+        current = start.x * self.height + start.y
+        if distances[current] == 0:
+            return []
+
+        if distances[current] == -1:
+            # start itself may not be walkable (or may be cut off); step onto its closest walkable neighbor
+            reachable = [neighbor for neighbor in self.neighbors(current) if distances[neighbor] != -1]
+            if not reachable:
+                return []
+            current = min(reachable, key=lambda neighbor: distances[neighbor])
+            path = [current]
+        else:
+            path = []
+
+        while distances[current] > 0:
+            target = distances[current] - 1
+            for neighbor in self.neighbors(current):
+                if distances[neighbor] == target:
+                    current = neighbor
+                    break
+            path.append(current)
+
+        return [Position.create(index // self.height, index % self.height, start.board_id) for index in path]
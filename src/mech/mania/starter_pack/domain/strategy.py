@@ -1,5 +1,10 @@
+import asyncio
 import logging
+from collections import deque
 
+import numpy as np
+
+from mech.mania.starter_pack.domain.model.board.board import Board
 from mech.mania.starter_pack.domain.model.characters.character_decision import CharacterDecision
 from mech.mania.starter_pack.domain.model.characters.position import Position
 from mech.mania.starter_pack.domain.model.characters.player import Player
@@ -175,6 +180,34 @@ class Strategy:
             action_index=0
         )
 
+    async def make_decision_async(self, player_name: str, game_state: GameState) -> CharacterDecision:
+        """
+        Called instead of make_decision by async_game_server.py. By default runs make_decision on a worker thread;
+        override it to await several API queries at once, e.g.
+
+            api = API(game_state, player_name).asynchronous()
+            in_danger = await asyncio.gather(*[api.in_range_of_attack(tile) for tile in tiles])
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, self.make_decision, player_name, game_state)
+
+    def fallback_decision(self, player_name: str, game_state: GameState) -> CharacterDecision:
+        """
+        A cheap decision the GameServer computes before calling make_decision and sends instead if make_decision
+        fails or misses the turn deadline: one step towards the closest living monster.
+        Must not use the API or the attributes make_decision sets, which may be in use by a running make_decision.
+        """
+        position = game_state.get_all_players()[player_name].get_position()
+        monsters = [monster for monster in game_state.get_monsters_on_board(position.get_board_id())
+                    if not monster.is_dead()]
+        if len(monsters) == 0:
+            return CharacterDecision(decision_type="NONE", action_position=None, action_index=-1)
+
+        closest = min(monsters, key=lambda monster: position.manhattan_distance(monster.get_position()))
+        step = self.move_to(position, closest.get_position())
+        if step is None:
+            return CharacterDecision(decision_type="NONE", action_position=None, action_index=-1)
+        return CharacterDecision(decision_type="MOVE", action_position=step, action_index=0)
+
     def is_better_item(self, item1, flat_attack_weight, flat_defense_weight, flat_speed_weight, flat_health_weight, experience_weight):
 
         if isinstance(item1, Consumable):
@@ -342,12 +375,7 @@ class Strategy:
         board[start.x][start.y] = 0
         board[end.x][end.y] = 1
 
-        iter = 0  # Used to verify I don't go into infinite steps because of impossible path
-        while board[start.x][start.y] == 0 and iter < len(board) * len(board[0]):
-            for i in range(len(board)):
-                for j in range(len(board[0])):
-                    board = self.update_board_step(board, i, j)
-            iter += 1
+        board = self.build_distance_field(board, end, start)
 
         i = start.x
         j = start.y
@@ -369,6 +397,25 @@ class Strategy:
     def path_find(self, board, start, end):
         return self.path_find_with_speed(board, start, end, self.my_player.get_speed())
 
+    # Fills board with (distance to end + 1) using a breadth first search from end. Walls stay -1 and
+    # unreachable tiles stay 0. Stops early once start has been reached, since every tile closer to end
+    # than start already holds its final distance at that point.
+    # The moves read from it are as short as with the relaxation sweep this replaced, but not always the same:
+    # the sweep stopped before labelling every tile as far from end as start, so when several neighbours are
+    # equally close to end, get_next_move_from_opt_board may pick another one of them.
+    def build_distance_field(self, board, end, start=None):
+        queue = deque([(end.x, end.y)])
+        while queue:
+            i, j = queue.popleft()
+            if start is not None and i == start.x and j == start.y:
+                break
+            step = board[i][j] + 1
+            for next_i, next_j in ((i + 1, j), (i - 1, j), (i, j + 1), (i, j - 1)):
+                if self.check_bounds(board, next_i, next_j) and board[next_i][next_j] == 0:
+                    board[next_i][next_j] = step
+                    queue.append((next_i, next_j))
+        return board
+
     def update_board_step(self, board, i, j):
         if board[i][j] > 0:
             if self.check_bounds(board, i + 1, j):
@@ -410,17 +457,7 @@ class Strategy:
         return i, j, pos
 
     def process_board(self, board):
-        grid = board.get_grid()
-        processed_grid = []
-        for row in grid:
-            processed_row = []
-            for tile in row:
-                if tile.get_type() == "IMPASSIBLE":
-                    processed_row.append(-1)
-                else:
-                    processed_row.append(0)
-            processed_grid.append(processed_row)
-        return processed_grid
+        return np.where(board.get_tile_types() == Board.IMPASSIBLE, -1, 0).tolist()
 
     def process_board_with_agro(self, board, target_monster, all_monsters):
         grid = board.get_grid()
@@ -525,6 +562,11 @@ class Strategy:
 
     def within_range(self, position: Position):
         return self.my_player.get_weapon().get_range() >= self.curr_pos.manhattan_distance(position)
+
+    # Walking distance from position to the closest portal on the current board (-1 if none can be reached).
+    # Backed by a table that is only rebuilt when the board's layout changes, so this is a constant time lookup.
+    def distance_to_portal(self, position: Position):
+        return self.board.get_terrain().get_portal_tables().distance_to_portal(position.x, position.y)
     
     def check_bounds(self, board, i, j):
         if i < 0 or j < 0:
@@ -0,0 +1,184 @@
+"""
+Checks the in-process API queries against recorded engine responses.
+
+  record: sends a set of queries built from a game state to the engine and saves every request/response pair
+      python api_parity_check.py record <game_state_or_player_turn.pb> <player_name> <out_dir> [--url URL]
+  check: answers every recorded request locally and compares the result with the recorded engine response
+      python api_parity_check.py check <out_dir>
+"""
+import argparse
+import os
+import sys
+
+from google.protobuf.message import Message
+from mech.mania.engine.domain.model import api_pb2
+from mech.mania.engine.domain.model import game_pb2
+from mech.mania.engine.domain.model import player_pb2
+from mech.mania.starter_pack.domain.api import API
+from mech.mania.starter_pack.domain.model.characters.character import Character
+from mech.mania.starter_pack.domain.model.characters.position import Position
+from mech.mania.starter_pack.domain.model.game_state import GameState
+
+
+# endpoint -> (request class, function building the APIQuery for a parsed request)
+ENDPOINTS = {
+    "pathFinding": (api_pb2.APIPathFindingRequest,
+                    lambda api, req: api.find_path_query(Position(req.start), Position(req.end))),
+    "findEnemiesByDistance": (api_pb2.APIFindEnemiesByDistanceRequest,
+                              lambda api, req: api.find_enemies_by_distance_query(Position(req.position))),
+    "findMonstersByExp": (api_pb2.APIFindMonstersByExpRequest,
+                          lambda api, req: api.find_monsters_by_exp_query(Position(req.position))),
+    "findItemsInRangeByDistance": (api_pb2.APIFindItemsInRangeByDistanceRequest,
+                                   lambda api, req: api.find_items_in_range_by_distance_query(
+                                       Position(req.position), req.range)),
+    "findEnemiesInRangeOfAttackByDistance": (api_pb2.APIFindEnemiesInRangeOfAttackByDistanceRequest,
+                                             lambda api, req: api.find_enemies_in_range_of_attack_by_distance_query(
+                                                 Position(req.position))),
+    "findAllEnemiesHit": (api_pb2.APIFindAllEnemiesHitRequest,
+                          lambda api, req: api.find_all_enemies_hit_query(Position(req.position))),
+    "inRangeOfAttack": (api_pb2.APIInRangeOfAttackRequest,
+                        lambda api, req: api.in_range_of_attack_query(Position(req.position))),
+    "findClosestPortal": (api_pb2.APIFindClosestPortalRequest,
+                          lambda api, req: api.find_closest_portal_query(Position(req.position))),
+    "leaderBoard": (api_pb2.APILeaderBoardRequest, lambda api, req: api.get_leaderboard_query()),
+}
+
+
+def normalize(value):
+    """
+    Turns API results into plain comparable values
+    """
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    if isinstance(value, Position):
+        return (value.board_id, value.x, value.y)
+    if isinstance(value, Character):
+        return value.get_name()
+    if isinstance(value, Message) or not hasattr(value, "__dict__"):
+        return value
+    # Items and their status modifiers compare by class and attributes
+    return (type(value).__name__, [(k, normalize(v)) for k, v in sorted(vars(value).items())])
+
+
+def same_result(endpoint, expected, actual):
+    if endpoint == "pathFinding" and expected is not None and actual is not None:
+        # Several shortest paths may exist; they must have the same length and end at the same tile
+        return len(expected) == len(actual) and normalize(expected[-1:]) == normalize(actual[-1:])
+    return normalize(expected) == normalize(actual)
+
+
+def read_game_state(path):
+    with open(path, "rb") as f:
+        data = f.read()
+
+    player_turn = player_pb2.PlayerTurn()
+    try:
+        player_turn.ParseFromString(data)
+        if player_turn.HasField("game_state"):
+            return player_turn.game_state
+    except Exception:
+        pass
+
+    game_state = game_pb2.GameState()
+    game_state.ParseFromString(data)
+    return game_state
+
+
+def sample_queries(api, game_state, player_name):
+    """
+    Yields (endpoint, APIQuery) pairs probing the positions of every character on the player's board
+    """
+    me = game_state.get_player(player_name)
+    board_id = me.get_position().get_board_id()
+    positions = [c.get_position() for c in game_state.get_players_on_board(board_id)]
+    positions += [c.get_position() for c in game_state.get_monsters_on_board(board_id)]
+    positions += [portal for portal in game_state.get_board(board_id).get_portals()]
+
+    yield "leaderBoard", api.get_leaderboard_query()
+    for pos in positions:
+        yield "pathFinding", api.find_path_query(me.get_position(), pos)
+        yield "findEnemiesByDistance", api.find_enemies_by_distance_query(pos)
+        yield "findMonstersByExp", api.find_monsters_by_exp_query(pos)
+        yield "findItemsInRangeByDistance", api.find_items_in_range_by_distance_query(pos, 5)
+        yield "findEnemiesInRangeOfAttackByDistance", api.find_enemies_in_range_of_attack_by_distance_query(pos)
+        yield "findAllEnemiesHit", api.find_all_enemies_hit_query(pos)
+        yield "inRangeOfAttack", api.in_range_of_attack_query(pos)
+        yield "findClosestPortal", api.find_closest_portal_query(pos)
+
+
+def record(game_state_path, player_name, out_dir, url):
+    game_state = GameState(read_game_state(game_state_path))
+    api = API(game_state, player_name, use_remote_queries=True, api_server_url=url)
+
+    os.makedirs(out_dir, exist_ok=True)
+    session = api.get_session()
+    count = 0
+    for endpoint, query in sample_queries(api, game_state, player_name):
+        data = api.serialize(query.payload)
+        response = session.post(api.API_SERVER_URL + endpoint, headers={'Content-Type': 'application/protobuf'},
+                                data=data, timeout=(api.connect_timeout, api.read_timeout))
+        name = os.path.join(out_dir, f"{count:05d}-{endpoint}")
+        with open(name + ".req", "wb") as f:
+            f.write(data)
+        with open(name + ".resp", "wb") as f:
+            f.write(response.content)
+        count += 1
+    print(f"Recorded {count} engine responses to {out_dir}")
+
+
+def check(out_dir):
+    mismatches = 0
+    checked = 0
+    for file_name in sorted(os.listdir(out_dir)):
+        if not file_name.endswith(".req"):
+            continue
+        endpoint = file_name[:-len(".req")].split("-", 1)[1]
+        request_class, build_query = ENDPOINTS[endpoint]
+
+        base = os.path.join(out_dir, file_name[:-len(".req")])
+        api_request = request_class()
+        with open(base + ".req", "rb") as f:
+            api_request.ParseFromString(f.read())
+
+        game_state = GameState(api_request.gameState)
+        player_name = getattr(api_request, "player_name", "")
+
+        remote_query = build_query(API(game_state, player_name, use_remote_queries=True), api_request)
+        with open(base + ".resp", "rb") as f:
+            remote_query.response.ParseFromString(f.read())
+        expected = remote_query.convert(remote_query.response) if remote_query.response.status.status == 200 else None
+
+        local_api = API(game_state, player_name)
+        actual = local_api.run(build_query(local_api, api_request))
+
+        checked += 1
+        if not same_result(endpoint, expected, actual):
+            mismatches += 1
+            print(f"MISMATCH {file_name}: engine {normalize(expected)} local {normalize(actual)}")
+
+    print(f"{checked - mismatches}/{checked} local results match the engine")
+    return mismatches == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record")
+    record_parser.add_argument("game_state")
+    record_parser.add_argument("player_name")
+    record_parser.add_argument("out_dir")
+    record_parser.add_argument("--url", help="engine API base URL, e.g. http://localhost:8082/api/")
+
+    check_parser = commands.add_parser("check")
+    check_parser.add_argument("out_dir")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args.game_state, args.player_name, args.out_dir, args.url)
+    else:
+        sys.exit(0 if check(args.out_dir) else 1)
+
+
+if __name__ == "__main__":
+    main()
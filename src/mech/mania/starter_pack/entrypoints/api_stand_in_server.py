@@ -0,0 +1,224 @@
+"""
+Local stand-in for the engine's API server, answering every api_pb2 endpoint from the starter pack's in-process
+query code. Latency and failures can be injected to load-test the client's connection pooling, timeouts, retries and
+batching without the engine.
+
+Usage: PYTHONPATH=src python src/mech/mania/starter_pack/entrypoints/api_stand_in_server.py [url] [port]
+       [--latency 20] [--jitter 10] [--error-rate 0.05] [--stall-rate 0.01] [--stall 10]
+
+then point the client at it with API_SERVER_URL=http://<url>:<port>/api/ (or API(..., api_server_url=...)).
+"""
+import argparse
+import logging
+import random
+import time
+
+from flask import Flask, request
+
+from mech.mania.engine.domain.model import api_pb2
+from mech.mania.starter_pack.domain.api import API
+from mech.mania.starter_pack.domain.metrics import METRICS
+from mech.mania.starter_pack.domain.model.characters.position import Position
+from mech.mania.starter_pack.domain.model.game_state import GameState
+
+
+class APIStandInServer:
+    """
+    Answers API requests the way the engine would, from the game state sent with each request. Endpoints it does
+    not know answer with status 501.
+
+    Every request is first delayed by latency plus a uniformly random jitter. Then, with probability error_rate,
+    it fails with HTTP 500, or with probability stall_rate it is held for stall more seconds before being answered,
+    which is longer than the client's read timeout by default.
+    """
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, stall_rate=0.0, stall=10.0, seed=None):
+        """
+        @param latency: Seconds every request is delayed by
+        @param jitter: Up to how many more seconds a request is delayed by, uniformly at random
+        @param error_rate: Fraction of the requests answered with HTTP 500
+        @param stall_rate: Fraction of the requests held for stall more seconds
+        @param seed: Seed of the random choices, for reproducible load tests
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.stall_rate = stall_rate
+        self.stall = stall
+        self.random = random.Random(seed)
+
+        self.handlers = {
+            "pathFinding": (api_pb2.APIPathFindingRequest, api_pb2.APIPathFindingResponse, self.path_finding),
+            "findEnemiesByDistance": (api_pb2.APIFindEnemiesByDistanceRequest,
+                                      api_pb2.APIFindEnemiesByDistanceResponse, self.find_enemies_by_distance),
+            "findMonstersByExp": (api_pb2.APIFindMonstersByExpRequest, api_pb2.APIFindMonstersByExpResponse,
+                                  self.find_monsters_by_exp),
+            "findItemsInRangeByDistance": (api_pb2.APIFindItemsInRangeByDistanceRequest,
+                                           api_pb2.APIFindItemsInRangeByDistanceResponse,
+                                           self.find_items_in_range_by_distance),
+            "findEnemiesInRangeOfAttackByDistance": (api_pb2.APIFindEnemiesInRangeOfAttackByDistanceRequest,
+                                                     api_pb2.APIFindEnemiesInRangeOfAttackByDistanceResponse,
+                                                     self.find_enemies_in_range_of_attack_by_distance),
+            "findAllEnemiesHit": (api_pb2.APIFindAllEnemiesHitRequest, api_pb2.APIFindAllEnemiesHitResponse,
+                                  self.find_all_enemies_hit),
+            "inRangeOfAttack": (api_pb2.APIInRangeOfAttackRequest, api_pb2.APIInRangeOfAttackResponse,
+                                self.in_range_of_attack),
+            "findClosestPortal": (api_pb2.APIFindClosestPortalRequest, api_pb2.APIFindClosestPortalResponse,
+                                  self.find_closest_portal),
+            "leaderBoard": (api_pb2.APILeaderBoardRequest, api_pb2.APILeaderBoardResponse, self.leader_board),
+        }
+
+    def handle(self, endpoint, payload):
+        """
+        @param endpoint: The endpoint name, e.g. "pathFinding"
+        @param payload: The serialized request
+        @return The serialized response
+        """
+        if endpoint not in self.handlers:
+            response = api_pb2.APIPathFindingResponse()
+            response.status.status = 501
+            response.status.message = f"{endpoint} is not implemented by the stand-in server"
+            return response.SerializeToString()
+
+        request_class, response_class, handler = self.handlers[endpoint]
+        api_request = request_class()
+        api_request.ParseFromString(payload)
+
+        response = response_class()
+        api = API(GameState(api_request.gameState), getattr(api_request, "player_name", ""))
+        if handler(api, api_request, response):
+            response.status.status = 200
+        else:
+            response.status.status = 400
+            response.status.message = "Invalid request"
+        return response.SerializeToString()
+
+    def get_fault(self):
+        """
+        @return "error", "stall" or None: the failure to inject into the next request
+        """
+        draw = self.random.random()
+        if draw < self.error_rate:
+            return "error"
+        if draw < self.error_rate + self.stall_rate:
+            return "stall"
+        return None
+
+    def path_finding(self, api, api_request, response):
+        path = api.find_path(Position(api_request.start), Position(api_request.end))
+        if path is None:
+            return False
+        response.path.extend([pos.build_proto_class() for pos in path])
+        return True
+
+    def find_enemies_by_distance(self, api, api_request, response):
+        enemies = api.find_enemies_by_distance(Position(api_request.position))
+        if enemies is None:
+            return False
+        response.enemies.extend([enemy.build_proto_class() for enemy in enemies])
+        return True
+
+    def find_monsters_by_exp(self, api, api_request, response):
+        monsters = api.findMonstersByExp(Position(api_request.position))
+        if monsters is None:
+            return False
+        response.monsters.extend([monster.build_proto_class() for monster in monsters])
+        return True
+
+    def find_items_in_range_by_distance(self, api, api_request, response):
+        # Item wrappers do not keep their protos, so the items are copied from the tiles of the request's board
+        pos = Position(api_request.position)
+        tiles = api.local_queries.tiles_with_items_in_range(pos, api_request.range)
+        if tiles is None:
+            return False
+
+        board_proto = api_request.gameState.board_names[pos.board_id]
+        for distance, x, y in tiles:
+            for item in board_proto.grid[x * board_proto.height + y].items:
+                response.items.add().CopyFrom(item)
+                response.positions.add().CopyFrom(Position.create(x, y, pos.board_id).build_proto_class())
+        return True
+
+    def find_enemies_in_range_of_attack_by_distance(self, api, api_request, response):
+        enemies = api.find_enemies_in_range_of_attack_by_distance(Position(api_request.position))
+        if enemies is None:
+            return False
+        response.enemies.extend([enemy.build_proto_class() for enemy in enemies])
+        return True
+
+    def find_all_enemies_hit(self, api, api_request, response):
+        enemies = api.find_all_enemies_hit(Position(api_request.position))
+        if enemies is None:
+            return False
+        response.enemies_hit.extend([enemy.build_proto_class() for enemy in enemies])
+        return True
+
+    def in_range_of_attack(self, api, api_request, response):
+        in_range = api.in_range_of_attack(Position(api_request.position))
+        if in_range is None:
+            return False
+        response.inRangeOfAttack = in_range
+        return True
+
+    def find_closest_portal(self, api, api_request, response):
+        portal = api.find_closest_portal(Position(api_request.position))
+        if portal is None:
+            return False
+        response.portal.CopyFrom(portal.build_proto_class())
+        return True
+
+    def leader_board(self, api, api_request, response):
+        response.leaderBoard.extend([p.build_proto_class() for p in api.get_leaderboard()])
+        return True
+
+    def create_app(self):
+        app = Flask(__name__)
+
+        @app.route('/api/<endpoint>', methods=['POST'])
+        def api_endpoint(endpoint):
+            METRICS.increment("stand_in_requests")
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            fault = self.get_fault()
+            if fault == "stall":
+                METRICS.increment("stand_in_stalls")
+                delay += self.stall
+            if delay > 0:
+                time.sleep(delay)
+            if fault == "error":
+                METRICS.increment("stand_in_errors")
+                return "Injected failure", 500
+
+            with METRICS.span("stand_in." + endpoint):
+                return self.handle(endpoint, request.get_data())
+
+        @app.route('/metrics', methods=['GET'])
+        def metrics():
+            return METRICS.render(), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
+        @app.route('/health', methods=['GET'])
+        def health():
+            return "200"
+
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("url", nargs="?", default="127.0.0.1")
+    parser.add_argument("port", nargs="?", type=int, default=8082)
+    parser.add_argument("--latency", type=float, default=0.0, help="milliseconds every request is delayed by")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="up to how many more milliseconds a request is delayed by, uniformly at random")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with HTTP 500")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="fraction of requests held for --stall seconds")
+    parser.add_argument("--stall", type=float, default=10.0, help="seconds a stalled request is held for")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = APIStandInServer(latency=args.latency / 1000, jitter=args.jitter / 1000, error_rate=args.error_rate,
+                              stall_rate=args.stall_rate, stall=args.stall, seed=args.seed)
+    server.create_app().run(host=args.url, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import argparse
+import asyncio
+import logging
+import time
+import traceback
+
+from aiohttp import web
+
+from mech.mania.starter_pack.domain.memory.memory_object import MemoryObject
+from mech.mania.starter_pack.domain.metrics import METRICS
+from mech.mania.starter_pack.domain.model.characters.character_decision import CharacterDecision
+from mech.mania.starter_pack.domain.model.game_state import GameState
+from mech.mania.starter_pack.domain.strategy import Strategy
+from mech.mania.starter_pack.entrypoints.game_server import decision_response
+from mech.mania.starter_pack.entrypoints.strategy_pool import StrategyPool
+from mech.mania.starter_pack.entrypoints.turn_recorder import TurnRecorder
+from mech.mania.engine.domain.model import player_pb2
+
+
+class AsyncGameServer:
+    """
+    asyncio variant of GameServer with the same /server, /health and /shutdown contract. Decisions come from
+    Strategy.make_decision_async, which can await several API queries concurrently (see API.asynchronous).
+    """
+    SHUTDOWN_DELAY = 10  # seconds to wait before shutting down server
+
+    def __init__(self, url, port, turn_budget=None, max_players=64, idle_timeout=600, record_path=None):
+        """
+        @param turn_budget: Seconds make_decision_async may take before the strategy's fallback decision is sent
+        instead, or None to always wait for it
+        @param max_players: How many idle players' strategies are kept, see StrategyPool
+        @param idle_timeout: Seconds after which the strategy of an idle player is dropped, see StrategyPool
+        @param record_path: If given, every turn and its decision are appended to this file, see TurnRecorder
+        """
+        self.url = url
+        self.port = port
+        self.strategies = StrategyPool(lambda player_name: Strategy(MemoryObject(player_name=player_name)),
+                                       max_players=max_players, idle_timeout=idle_timeout)
+        self.turn_budget = turn_budget
+        self.recorder = TurnRecorder(record_path) if record_path else None
+        self.logger = logging.getLogger('async_game_server')
+        self.logger.setLevel(logging.INFO)
+        self.stopping = None
+
+        try:
+            asyncio.run(self.serve())
+        except Exception as e:
+            self.logger.info("Failed to start GameServer: " + str(e))
+
+    async def send_decision(self, request):
+        turn_begin = time.perf_counter()
+        received = time.monotonic()
+        payload = await request.read()
+
+        player_turn = player_pb2.PlayerTurn()
+        with METRICS.span("parse"):
+            player_turn.ParseFromString(payload)
+
+        self.logger.info(f"Received playerTurn for player: {player_turn.player_name}, turn: {player_turn.game_state.state_id}")
+
+        with METRICS.span("game_state"):
+            game_state = GameState(player_turn.game_state)
+        player_name = player_turn.player_name
+
+        METRICS.increment("turns")
+        # Creating the strategy of a new player may connect to Redis, which must not block the event loop
+        player = await asyncio.get_running_loop().run_in_executor(None, self.strategies.acquire, player_name)
+        if self.turn_budget is not None:
+            decision = await self.decide_before_deadline(player, game_state, received + self.turn_budget)
+        else:
+            try:
+                decision = await self.make_decision(player, game_state)
+            except Exception:
+                self.logger.info("Exception making decision:")
+                traceback.print_exc()
+                METRICS.increment("decision_errors")
+                decision = None
+
+        response_msg = decision_response(decision, self.logger)
+
+        self.logger.info("Sending playerDecision")
+
+        with METRICS.span("serialize"):
+            response = response_msg.SerializeToString()
+        METRICS.observe("turn", time.perf_counter() - turn_begin)
+
+        if self.recorder is not None:
+            self.recorder.record(payload, response)
+        return web.Response(body=response)
+
+    async def make_decision(self, player, game_state, deadline=None):
+        """
+        Runs the strategy of a player for one turn, then releases the player back to the pool
+
+        @param player: A PlayerStrategy acquired from self.strategies
+        @param deadline: time.monotonic() after which the strategy is not run anymore, or None to always run it
+        @return The strategy's decision, or None if the deadline passed before the player's previous turn was over
+        """
+        try:
+            lock = player.get_async_lock()
+            if deadline is None:
+                await lock.acquire()
+            else:
+                # See GameServer.make_decision
+                try:
+                    await asyncio.wait_for(lock.acquire(), timeout=max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    return None
+            try:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return None
+                with METRICS.span("make_decision"):
+                    return await player.strategy.make_decision_async(player.player_name, game_state)
+            finally:
+                lock.release()
+        finally:
+            self.strategies.release(player)
+
+    async def decide_before_deadline(self, player, game_state, deadline):
+        """
+        Runs make_decision_async under the turn budget, see GameServer.decide_before_deadline
+
+        @param deadline: time.monotonic() by which the decision must be made
+        """
+        try:
+            with METRICS.span("fallback_decision"):
+                fallback = player.strategy.fallback_decision(player.player_name, game_state)
+        except Exception:
+            self.logger.info("Exception making fallback decision:")
+            traceback.print_exc()
+            fallback = None
+
+        if time.monotonic() >= deadline:
+            self.strategies.release(player)
+            METRICS.increment("turn_timeouts")
+            self.logger.info(f"The {self.turn_budget}s turn deadline passed before make_decision could start, sending the fallback decision")
+            return fallback
+
+        try:
+            # Shielded: a decision that overran keeps the player locked until make_decision_async returns
+            decision = await asyncio.wait_for(asyncio.shield(self.make_decision(player, game_state, deadline)),
+                                              timeout=deadline - time.monotonic())
+        except asyncio.TimeoutError:
+            METRICS.increment("turn_timeouts")
+            self.logger.info(f"make_decision missed the {self.turn_budget}s turn deadline, sending the fallback decision")
+            return fallback
+        except Exception:
+            self.logger.info("Exception making decision:")
+            traceback.print_exc()
+            METRICS.increment("decision_errors")
+            return fallback
+
+        if not isinstance(decision, CharacterDecision):
+            return fallback
+        return decision
+
+    async def shutdown(self, request):
+        # Saves what write-behind memories hold now; they are closed once the server stops answering turns
+        await asyncio.get_running_loop().run_in_executor(None, self.strategies.flush_all)
+
+        asyncio.get_running_loop().call_later(self.SHUTDOWN_DELAY, self.stopping.set)
+
+        return web.Response(text='Server shutting down...')
+
+    async def health(self, request):
+        return web.Response(text="200")
+
+    async def metrics(self, request):
+        return web.Response(text=METRICS.render(), content_type="text/plain")
+
+    def create_app(self):
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post('/server', self.send_decision)
+        app.router.add_post('/shutdown', self.shutdown)
+        app.router.add_get('/health', self.health)
+        app.router.add_get('/metrics', self.metrics)
+        return app
+
+    async def serve(self):
+        self.stopping = asyncio.Event()
+
+        runner = web.AppRunner(self.create_app())
+        await runner.setup()
+        await web.TCPSite(runner, self.url, self.port).start()
+
+        await self.stopping.wait()
+        # Stops listening and waits for the requests in progress before returning
+        await runner.cleanup()
+        self.strategies.close_all()
+        if self.recorder is not None:
+            self.recorder.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url")
+    parser.add_argument("port", type=int)
+    parser.add_argument("--turn-budget", type=float, default=None,
+                        help="seconds make_decision may take before a fallback decision is sent instead")
+    parser.add_argument("--max-players", type=int, default=64, help="idle players whose strategy is kept")
+    parser.add_argument("--idle-timeout", type=float, default=600,
+                        help="seconds after which the strategy of an idle player is dropped")
+    parser.add_argument("--record", metavar="PATH", help="append every turn and decision to this log file")
+    args = parser.parse_args()
+    AsyncGameServer(args.url, args.port, turn_budget=args.turn_budget, max_players=args.max_players,
+                    idle_timeout=args.idle_timeout, record_path=args.record)
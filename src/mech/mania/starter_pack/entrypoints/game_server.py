@@ -1,4 +1,6 @@
-import sys
+import argparse
+import concurrent.futures
+import threading
 import time
 import traceback
 import logging
@@ -6,24 +8,54 @@ import logging
 from flask import Flask, request
 
 from mech.mania.starter_pack.domain.memory.memory_object import MemoryObject
+from mech.mania.starter_pack.domain.metrics import METRICS
 from mech.mania.starter_pack.domain.model.characters.character import Character
 from mech.mania.starter_pack.domain.model.characters.character_decision import CharacterDecision
 from mech.mania.starter_pack.domain.model.game_state import GameState
 from mech.mania.starter_pack.domain.strategy import Strategy
+from mech.mania.starter_pack.entrypoints.lean_decision import LeanDecisionEndpoint
+from mech.mania.starter_pack.entrypoints.serving import SERVERS, create_server
+from mech.mania.starter_pack.entrypoints.strategy_pool import StrategyPool
+from mech.mania.starter_pack.entrypoints.turn_recorder import TurnRecorder
 from mech.mania.engine.domain.model import character_pb2
 from mech.mania.engine.domain.model import player_pb2
 
 
 class GameServer:
-    def __init__(self, url, port, testing_objects=None):
+    # Threads running make_decision when there is a turn budget, on top of one per request thread. A decision
+    # that overran its turn keeps its thread until it returns, so there are a few spare ones for the following turns.
+    DECISION_THREADS = 4
+
+    def __init__(self, url, port, testing_objects=None, server="flask", workers=1, threads=1, turn_budget=None,
+                 max_players=64, idle_timeout=600, record_path=None, lean=False):
+        """
+        @param server: The WSGI server to run, a key of serving.SERVERS
+        @param workers: Number of worker processes, for servers that fork
+        @param threads: Number of request threads per worker
+        @param turn_budget: Seconds make_decision may take before the strategy's fallback decision is sent instead,
+        or None to always wait for make_decision
+        @param max_players: How many idle players' strategies a worker keeps, see StrategyPool
+        @param idle_timeout: Seconds after which the strategy of an idle player is dropped, see StrategyPool
+        @param record_path: If given, every turn and its decision are appended to this file (one file per worker
+        process, see TurnRecorder)
+        @param lean: Answer /server through LeanDecisionEndpoint instead of Flask, parsing turns from a reused buffer
+        """
         log = logging.getLogger('werkzeug')
         log.setLevel(logging.ERROR)
 
         self.url = url
         self.port = port
         self.debug = False
-        self.memory = MemoryObject()
-        self.strategy = Strategy(self.memory)
+        self.strategies = StrategyPool(lambda player_name: Strategy(MemoryObject(player_name=player_name)),
+                                       max_players=max_players, idle_timeout=idle_timeout)
+
+        self.recorder = TurnRecorder(record_path) if record_path else None
+
+        self.turn_budget = turn_budget
+        self.decision_executor = None
+        if turn_budget is not None:
+            self.decision_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=threads + self.DECISION_THREADS)
 
         if testing_objects is not None:
             self.atomicInt = testing_objects
@@ -35,73 +67,210 @@ class GameServer:
 
         @app.route('/server', methods=['POST'])
         def send_decision():
-            payload = request.get_data()
+            received = time.monotonic()
+            return self.answer_turn(request.get_data(), player_pb2.PlayerTurn(), app.logger, received)
+
+        @app.route('/metrics', methods=['GET'])
+        def metrics():
+            return METRICS.render(), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
+        @app.route('/shutdown', methods=['POST'])
+        def shutdown():
+            # Saves what write-behind memories hold now; they are closed once the server stops answering turns
+            self.strategies.flush_all()
+
+            delay = 10000  # ms to wait before shutting down server
+            timer = threading.Timer(delay / 1e3, shutdown_server)
+            timer.daemon = True
+            timer.start()
+
+            return 'Server shutting down...'
+
+        def shutdown_server():
+            try:
+                self.server.shutdown()
+            except Exception as e:
+                app.logger.info("Failed to shutdown GameServer: " + str(e))
+
+        @app.route('/health', methods=['GET'])
+        def health():
+            return "200"
+
+        if lean:
+            app.wsgi_app = LeanDecisionEndpoint(
+                app.wsgi_app,
+                lambda payload, player_turn, received: self.answer_turn(payload, player_turn, app.logger, received))
+
+        try:
+            self.server = create_server(server, app, self.url, self.port, workers=workers, threads=threads,
+                                        on_exit=self.close)
+            self.server.serve_forever()
+        except Exception as e:
+            app.logger.info("Failed to start GameServer: " + str(e))
+
+    def close(self):
+        """
+        Saves and closes the memory of every player and the turn log. Called by every process that answered
+        turns, once it has stopped.
+        """
+        self.strategies.close_all()
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def answer_turn(self, payload, player_turn, logger, received=None):
+        """
+        Decides one turn
 
-            player_turn = player_pb2.PlayerTurn()
+        @param payload: The serialized PlayerTurn, as bytes or a memoryview
+        @param player_turn: The PlayerTurn message to parse the payload into
+        @param received: time.monotonic() when the request arrived, from which the turn budget is counted;
+        defaults to now
+        @return The serialized CharacterDecision
+        """
+        turn_begin = time.perf_counter()
+        if received is None:
+            received = time.monotonic()
+        with METRICS.span("parse"):
             player_turn.ParseFromString(payload)
 
-            app.logger.info(f"Received playerTurn for player: {player_turn.player_name}, turn: {player_turn.game_state.state_id}")
+        logger.info(f"Received playerTurn for player: {player_turn.player_name}, turn: {player_turn.game_state.state_id}")
 
+        with METRICS.span("game_state"):
             game_state = GameState(player_turn.game_state)
-            player_name = player_turn.player_name
-
-            response_msg = character_pb2.CharacterDecision()
+        player_name = player_turn.player_name
 
+        METRICS.increment("turns")
+        player = self.strategies.acquire(player_name)
+        if self.turn_budget is not None:
+            decision = self.decide_before_deadline(player, game_state, logger, received + self.turn_budget)
+        else:
             try:
-                decision = self.strategy.make_decision(player_name, game_state)
+                decision = self.make_decision(player, game_state)
             except Exception as err:
-                app.logger.info("Exception making decision:")
+                logger.info("Exception making decision:")
                 traceback.print_exc()
+                METRICS.increment("decision_errors")
                 decision = None
 
-            if decision is not None and isinstance(decision, CharacterDecision):
-                response_msg = decision.build_proto_class_character_decision()
-            else:
-                # Build NONE decision if contestant code failed
-                response_msg.decision_type = character_pb2.NONE
-                response_msg.index = -1
+        response_msg = decision_response(decision, logger)
 
-                # Log incorrect return type
-                app.logger.info("Recieved incorrect type for decision. Expected: CharacterDecision, Actual: " + str(type(decision)))
+        if self.debug:
+            self.atomicInt.increment()
 
-            if self.debug:
-                self.atomicInt.increment()
+        logger.info("Sending playerDecision")
 
-            app.logger.info("Sending playerDecision")
+        with METRICS.span("serialize"):
+            response = response_msg.SerializeToString()
+        METRICS.observe("turn", time.perf_counter() - turn_begin)
 
-            return response_msg.SerializeToString()
+        if self.recorder is not None:
+            self.recorder.record(payload, response)
+        return response
 
-        @app.route('/shutdown', methods=['POST'])
-        def shutdown():
-            # saveAndClose Redis connection
-            self.memory.save_and_close()
+    def make_decision(self, player, game_state, deadline=None):
+        """
+        Runs the strategy of a player for one turn, then releases the player back to the pool
 
-            delay = 10000  # ms to wait before shutting down server
+        @param player: A PlayerStrategy acquired from self.strategies
+        @param deadline: time.monotonic() after which the strategy is not run anymore, or None to always run it
+        @return The strategy's decision, or None if the deadline passed before the player's previous turn was over
+        """
+        try:
+            if deadline is None:
+                with player.lock, METRICS.span("make_decision"):
+                    return player.strategy.make_decision(player.player_name, game_state)
+
+            # A turn that cannot start in time gives its thread back rather than waiting for the player's previous
+            # turn, then deciding on a game state the engine has moved past
+            if not player.lock.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                return None
             try:
-                shutdown_server(delay)
-            except Exception as e:
-                app.logger.info("Failed to shutdown GameServer: " + e)
+                if time.monotonic() >= deadline:
+                    return None
+                with METRICS.span("make_decision"):
+                    return player.strategy.make_decision(player.player_name, game_state)
+            finally:
+                player.lock.release()
+        finally:
+            self.strategies.release(player)
 
-            return 'Server shutting down...'
+    def decide_before_deadline(self, player, game_state, logger, deadline):
+        """
+        Runs make_decision under the turn budget
 
-        def shutdown_server(delay):
-            func = request.environ.get('werkzeug.server.shutdown')
-            if func is None:
-                raise RuntimeError('Not running with the Werkzeug Server')
-            time.sleep(delay / 1e3)
-            func()
+        @param deadline: time.monotonic() by which the decision must be made: the turn budget after the request
+        arrived, so parsing and waiting for a thread count against it
+        @return The decision of make_decision if it finishes in time with a CharacterDecision, otherwise the
+        strategy's fallback decision
+        """
+        try:
+            with METRICS.span("fallback_decision"):
+                fallback = player.strategy.fallback_decision(player.player_name, game_state)
+        except Exception:
+            logger.info("Exception making fallback decision:")
+            traceback.print_exc()
+            fallback = None
 
-        @app.route('/health', methods=['GET'])
-        def health():
-            return "200"
+        if time.monotonic() >= deadline:
+            # Already late: running the strategy would only take a thread from the following turns
+            self.strategies.release(player)
+            METRICS.increment("turn_timeouts")
+            logger.info(f"The {self.turn_budget}s turn deadline passed before make_decision could start, sending the fallback decision")
+            return fallback
 
+        future = self.decision_executor.submit(self.make_decision, player, game_state, deadline)
         try:
-            app.run(host=self.url, port=self.port)
-        except Exception as e:
-            app.logger.info("Failed to start GameServer: " + e)
+            decision = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except concurrent.futures.TimeoutError:
+            METRICS.increment("turn_timeouts")
+            logger.info(f"make_decision missed the {self.turn_budget}s turn deadline, sending the fallback decision")
+            return fallback
+        except Exception:
+            logger.info("Exception making decision:")
+            traceback.print_exc()
+            METRICS.increment("decision_errors")
+            return fallback
+
+        if not isinstance(decision, CharacterDecision):
+            return fallback
+        return decision
+
+
+def decision_response(decision, logger):
+    """
+    @param decision: What Strategy.make_decision returned, or None if it raised
+    @return The CharacterDecision proto to send to the engine, a NONE decision if the strategy failed
+    """
+    if decision is not None and isinstance(decision, CharacterDecision):
+        return decision.build_proto_class_character_decision()
+
+    # Build NONE decision if contestant code failed
+    response_msg = character_pb2.CharacterDecision()
+    response_msg.decision_type = character_pb2.NONE
+    response_msg.index = -1
+
+    # Log incorrect return type
+    logger.info("Recieved incorrect type for decision. Expected: CharacterDecision, Actual: " + str(type(decision)))
+    return response_msg
 
 
 if __name__ == "__main__":
-    url = sys.argv[1]
-    port = int(sys.argv[2])
-    GameServer(url, port)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url")
+    parser.add_argument("port", type=int)
+    parser.add_argument("--server", choices=sorted(SERVERS), default="flask",
+                        help="flask: single-process development server, gunicorn: pre-fork production server")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (gunicorn)")
+    parser.add_argument("--threads", type=int, default=1, help="request threads per worker (gunicorn)")
+    parser.add_argument("--turn-budget", type=float, default=None,
+                        help="seconds make_decision may take before a fallback decision is sent instead")
+    parser.add_argument("--max-players", type=int, default=64, help="idle players whose strategy is kept per worker")
+    parser.add_argument("--idle-timeout", type=float, default=600,
+                        help="seconds after which the strategy of an idle player is dropped")
+    parser.add_argument("--record", metavar="PATH", help="append every turn and decision to this log file (PATH.<pid> for each gunicorn worker)")
+    parser.add_argument("--lean", action="store_true",
+                        help="answer /server without Flask's request handling, parsing turns from a reused buffer")
+    args = parser.parse_args()
+    GameServer(args.url, args.port, server=args.server, workers=args.workers, threads=args.threads,
+               turn_budget=args.turn_budget, max_players=args.max_players, idle_timeout=args.idle_timeout,
+               record_path=args.record, lean=args.lean)
@@ -0,0 +1,94 @@
+import threading
+import time
+import traceback
+
+from mech.mania.engine.domain.model import player_pb2
+
+
+class LeanDecisionEndpoint:
+    """
+    WSGI middleware answering POST requests to one path (the game server's /server) without going through Flask.
+    The body is read straight into a buffer reused by every request of the same thread and parsed from a
+    memoryview of it into a PlayerTurn message that is also reused, so a turn neither builds a Flask request nor
+    copies the body into a new bytes object. Every other request is passed on to the wrapped app.
+
+    The request and response bodies are the same as the Flask route's. Requests without a Content-Length (e.g.
+    chunked ones) are passed on to the wrapped app as well.
+    """
+    INITIAL_BUFFER_SIZE = 1 << 20
+
+    def __init__(self, app, answer_turn, path="/server"):
+        """
+        @param app: The WSGI app answering every other request
+        @param answer_turn: Called with a memoryview of the body, the PlayerTurn to parse it into, which the
+        thread reuses for its next request, and the time.monotonic() at which the request arrived; returns the
+        serialized response. The memoryview is only valid until answer_turn returns.
+        """
+        self.app = app
+        self.answer_turn = answer_turn
+        self.path = path
+        self.local = threading.local()
+
+    def __call__(self, environ, start_response):
+        if environ.get("PATH_INFO") != self.path or environ.get("REQUEST_METHOD") != "POST":
+            return self.app(environ, start_response)
+        received = time.monotonic()
+        try:
+            length = int(environ.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            length = 0
+        if length <= 0:
+            return self.app(environ, start_response)
+
+        body = self.read_body(environ["wsgi.input"], length)
+        if body is None:
+            return self.respond(start_response, "400 BAD REQUEST", b"Incomplete request body")
+
+        try:
+            response = self.answer_turn(body, self.get_player_turn(), received)
+        except Exception:
+            traceback.print_exc()
+            return self.respond(start_response, "500 INTERNAL SERVER ERROR", b"Internal Server Error")
+        finally:
+            body.release()
+        return self.respond(start_response, "200 OK", response)
+
+    def get_buffer(self, length):
+        buffer = getattr(self.local, "buffer", None)
+        if buffer is None or len(buffer) < length:
+            buffer = self.local.buffer = bytearray(max(length, self.INITIAL_BUFFER_SIZE,
+                                                       2 * len(buffer) if buffer is not None else 0))
+        return buffer
+
+    def get_player_turn(self):
+        player_turn = getattr(self.local, "player_turn", None)
+        if player_turn is None:
+            player_turn = self.local.player_turn = player_pb2.PlayerTurn()
+        return player_turn
+
+    def read_body(self, stream, length):
+        """
+        @return A memoryview of the `length` bytes of the body in this thread's buffer, or None if the stream ended
+        before
+        """
+        view = memoryview(self.get_buffer(length))[:length]
+        read = 0
+        readinto = getattr(stream, "readinto", None)
+        while read < length:
+            if readinto is not None:
+                count = readinto(view[read:])
+            else:
+                # Servers whose input stream cannot read into a buffer, e.g. gunicorn
+                chunk = stream.read(length - read)
+                count = len(chunk)
+                view[read:read + count] = chunk
+            if not count:
+                view.release()
+                return None
+            read += count
+        return view
+
+    @staticmethod
+    def respond(start_response, status, body):
+        start_response(status, [("Content-Type", "text/html; charset=utf-8"), ("Content-Length", str(len(body)))])
+        return [body]
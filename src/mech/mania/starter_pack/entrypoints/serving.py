@@ -0,0 +1,92 @@
+import os
+import signal
+import threading
+
+from werkzeug.serving import make_server
+
+
+class DevelopmentServer:
+    """
+    Werkzeug's threaded development server in a single process. Needs no extra dependencies; meant for local runs.
+    """
+    def __init__(self, app, url, port, workers=1, threads=1, on_exit=None):
+        self.server = make_server(url, port, app, threaded=True)
+        self.on_exit = on_exit
+
+    def serve_forever(self):
+        self.server.serve_forever()
+        if self.on_exit is not None:
+            self.on_exit()
+
+    def shutdown(self):
+        """
+        Stops accepting requests and returns from serve_forever once the requests in progress are answered
+        """
+        # BaseServer.shutdown waits for the serve_forever loop, so it must not run on a thread serving a request
+        threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+
+class GunicornServer:
+    """
+    Gunicorn pre-fork server: a master process supervising `workers` worker processes with `threads` threads each.
+    Every worker process gets its own copy of the app, including its own Strategy and MemoryObject, and calls
+    on_exit once it has stopped answering requests. Requires gunicorn (Unix only).
+    """
+    GRACEFUL_TIMEOUT = 30
+
+    def __init__(self, app, url, port, workers=1, threads=1, on_exit=None):
+        from gunicorn.app.base import BaseApplication
+
+        options = {
+            "bind": f"{url}:{port}",
+            "workers": workers,
+            "threads": threads,
+            "worker_class": "gthread" if threads > 1 else "sync",
+            "graceful_timeout": self.GRACEFUL_TIMEOUT,
+            "loglevel": "error",
+        }
+        if on_exit is not None:
+            # Runs in the worker process, after its last request, whether the master stopped it or it died
+            options["worker_exit"] = lambda server, worker: on_exit()
+
+        class Application(BaseApplication):
+            def load_config(self):
+                for key, value in options.items():
+                    self.cfg.set(key, value)
+
+            def load(self):
+                return app
+
+        self.application = Application()
+        self.master_pid = None
+
+    def serve_forever(self):
+        self.master_pid = os.getpid()
+        self.application.run()
+
+    def shutdown(self):
+        """
+        Asks the master to stop: workers finish the requests in progress (up to GRACEFUL_TIMEOUT seconds) and exit
+        """
+        os.kill(self.master_pid, signal.SIGTERM)
+
+
+# Servers selectable with game_server.py --server
+SERVERS = {
+    "flask": DevelopmentServer,
+    "gunicorn": GunicornServer,
+}
+
+
+def create_server(name, app, url, port, workers=1, threads=1, on_exit=None):
+    """
+    @param name: A key of SERVERS
+    @param app: The WSGI application to serve
+    @param workers: Number of worker processes (servers that fork)
+    @param threads: Number of request threads per worker
+    @param on_exit: Called without arguments in every process that served the app, once it stops serving
+    @return A server with serve_forever() and shutdown()
+    """
+    if name not in SERVERS:
+        raise ValueError(f"Unknown server '{name}', expected one of: {', '.join(SERVERS)}")
+    return SERVERS[name](app, url, port, workers=workers, threads=threads, on_exit=on_exit)
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+
+class PlayerStrategy:
+    """
+    The Strategy serving one player. Turns of the same player must hold `lock` (or `get_async_lock()` on an event
+    loop) while running the strategy, since make_decision keeps per-turn state on the Strategy instance.
+    """
+    def __init__(self, player_name, strategy):
+        self.player_name = player_name
+        self.strategy = strategy
+        self.lock = threading.Lock()
+        self.async_lock = None
+        self.users = 0
+        self.last_used = time.monotonic()
+
+    def get_async_lock(self):
+        # Created on first use so it belongs to the running event loop
+        if self.async_lock is None:
+            self.async_lock = asyncio.Lock()
+        return self.async_lock
+
+
+class StrategyPool:
+    """
+    One Strategy per player name, created on that player's first turn, so a single process can serve several bots
+    without them sharing state. Players idle for more than `idle_timeout` seconds, and the least recently used
+    players beyond `max_players`, are evicted and their memory saved and closed. Players with a turn in progress
+    are never evicted.
+
+        player = pool.acquire(player_name)
+        try:
+            with player.lock:
+                decision = player.strategy.make_decision(player_name, game_state)
+        finally:
+            pool.release(player)
+    """
+    def __init__(self, create_strategy, max_players=64, idle_timeout=600):
+        """
+        @param create_strategy: Function building the Strategy of a player from the player's name
+        @param max_players: How many players are kept at most while idle
+        @param idle_timeout: Seconds after which an idle player is evicted, or None to only evict beyond max_players
+        """
+        self.create_strategy = create_strategy
+        self.max_players = max_players
+        self.idle_timeout = idle_timeout
+        self.players = OrderedDict()
+        self.lock = threading.Lock()
+
+    def acquire(self, player_name):
+        """
+        @return The PlayerStrategy of the player, created if needed. It is not evicted until release() is called.
+        """
+        with self.lock:
+            player = self.players.get(player_name)
+            if player is not None:
+                self.players.move_to_end(player_name)
+                player.users += 1
+                player.last_used = time.monotonic()
+                evicted = self.select_evicted()
+
+        if player is None:
+            # Built outside the lock: creating a strategy may connect to Redis
+            created = PlayerStrategy(player_name, self.create_strategy(player_name))
+            with self.lock:
+                player = self.players.setdefault(player_name, created)
+                self.players.move_to_end(player_name)
+                player.users += 1
+                player.last_used = time.monotonic()
+                evicted = self.select_evicted()
+            if player is not created:
+                # Another thread created the same player first
+                evicted.append(created)
+
+        for other in evicted:
+            self.close(other)
+        return player
+
+    def release(self, player):
+        with self.lock:
+            player.users -= 1
+            player.last_used = time.monotonic()
+
+        # The turn is over: a write-behind memory saves what the strategy wrote during it
+        memory = getattr(player.strategy, "memory", None)
+        if memory is not None and hasattr(memory, "end_turn"):
+            memory.end_turn()
+
+    def select_evicted(self):
+        """
+        Removes the players to evict from the pool; must be called holding the pool lock
+
+        @return The removed players, to be closed outside the lock
+        """
+        now = time.monotonic()
+        idle = [player for player in self.players.values() if player.users == 0]
+
+        evicted = []
+        excess = len(self.players) - self.max_players
+        for player in idle:  # least recently used first
+            if excess > 0 or (self.idle_timeout is not None and now - player.last_used > self.idle_timeout):
+                del self.players[player.player_name]
+                evicted.append(player)
+                excess -= 1
+        return evicted
+
+    def close(self, player):
+        memory = getattr(player.strategy, "memory", None)
+        if memory is not None:
+            memory.save_and_close()
+
+    def flush_all(self):
+        """
+        Saves what the write-behind memory of every player still holds, without closing it
+        """
+        with self.lock:
+            players = list(self.players.values())
+        for player in players:
+            memory = getattr(player.strategy, "memory", None)
+            if memory is not None and hasattr(memory, "flush"):
+                memory.flush()
+
+    def close_all(self):
+        """
+        Saves and closes the memory of every player, e.g. before shutting down
+        """
+        with self.lock:
+            players = list(self.players.values())
+        for player in players:
+            self.close(player)
+
+    def get_player_names(self):
+        with self.lock:
+            return list(self.players)
@@ -0,0 +1,79 @@
+import os
+import struct
+import threading
+
+# Every record is a serialized PlayerTurn followed by the serialized CharacterDecision sent back, each preceded by
+# its length as an unsigned 32 bit little-endian integer
+LENGTH = struct.Struct("<I")
+
+
+class TurnRecorder:
+    """
+    Appends every turn a game server answers to a log file, so slow or surprising turns can be replayed offline
+    with benchmarks/replay.py. Enabled with --record on the game server command line.
+
+    The file is opened on the first record, in the process answering the turn. Worker processes forked from the
+    process that created the recorder (e.g. by gunicorn) each write their own log, `<path>.<pid>`, so that records
+    of different workers never interleave.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.creator_pid = os.getpid()
+        self.file = None
+        # Process that opened self.file; a forked worker inherits the file but must not write to it
+        self.file_pid = None
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def get_path(self):
+        """
+        @return The log file of the calling process
+        """
+        pid = os.getpid()
+        return self.path if pid == self.creator_pid else f"{self.path}.{pid}"
+
+    def record(self, player_turn, decision):
+        """
+        @param player_turn: The PlayerTurn bytes as received from the engine
+        @param decision: The CharacterDecision bytes sent back
+        """
+        record = LENGTH.pack(len(player_turn)) + player_turn + LENGTH.pack(len(decision)) + decision
+        with self.lock:
+            if self.closed:
+                return
+            if self.file_pid != os.getpid():
+                self.file = open(self.get_path(), "ab")
+                self.file_pid = os.getpid()
+            self.file.write(record)
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            if self.file is not None and self.file_pid == os.getpid():
+                self.file.close()
+
+
+def read_turns(path):
+    """
+    @return A generator of (PlayerTurn bytes, CharacterDecision bytes) for every complete record of a turn log. A
+    record cut short (e.g. by a crash while writing it) ends the log.
+    """
+    with open(path, "rb") as f:
+        while True:
+            player_turn = read_field(f)
+            decision = read_field(f)
+            if player_turn is None or decision is None:
+                return
+            yield player_turn, decision
+
+
+def read_field(f):
+    header = f.read(LENGTH.size)
+    if len(header) < LENGTH.size:
+        return None
+    length, = LENGTH.unpack(header)
+    data = f.read(length)
+    if len(data) < length:
+        return None
+    return data
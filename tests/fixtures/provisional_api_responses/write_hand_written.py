@@ -0,0 +1,227 @@
+"""
+Writes the provisional hand_written fixture: API requests on a small game state with the responses expected for
+them, in the format of api_parity_check.py record. The expected answers are written out below rather than computed
+or recorded from the engine, see README.md.
+
+Usage: PYTHONPATH=src python tests/fixtures/provisional_api_responses/write_hand_written.py
+"""
+import os
+import shutil
+
+from mech.mania.engine.domain.model import api_pb2
+from mech.mania.engine.domain.model import board_pb2
+from mech.mania.engine.domain.model import game_pb2
+from mech.mania.starter_pack.domain.api import API
+from mech.mania.starter_pack.domain.model.characters.position import Position
+from mech.mania.starter_pack.domain.model.game_state import GameState
+
+OUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hand_written")
+
+
+def build_game_state():
+    """
+    "arena" is 5x5 (x right, y down), "other" is 3x3:
+
+        arena   x=0     1       2       3       4           other   x=0  1  2
+        y=0     hero    .       .       goblin  .           y=0     bat  .  .
+        y=1     hat     rival   #       .       consumable  y=1     .    .  .
+        y=2     .       .       #       .       .           y=2     .    .  portal
+        y=3     troll+  weapon  #       .       .
+        y=4     .       .       .       .       portal
+
+    hero and rival are players, goblin, troll (dead) and bat monsters; # is impassable
+    """
+    game_state = game_pb2.GameState()
+    game_state.state_id = 1
+    add_board(game_state, "arena", 5, 5, walls=[(2, 1), (2, 2), (2, 3)], portals=[(4, 4)])
+    add_board(game_state, "other", 3, 3, walls=[], portals=[(2, 2)])
+
+    arena = game_state.board_names["arena"]
+    arena.grid[0 * 5 + 1].items.add().hat.max_stack = 1
+    weapon = arena.grid[1 * 5 + 3].items.add().weapon
+    weapon.max_stack = 1
+    weapon.range = 2
+    consumable = arena.grid[4 * 5 + 1].items.add().consumable
+    consumable.max_stack = 5
+    consumable.stacks = 2
+
+    add_character(game_state.player_names["hero"].character, "hero", "arena", 0, 0, level=2, experience=50,
+                  weapon_range=2, splash_radius=1)
+    add_character(game_state.player_names["rival"].character, "rival", "arena", 1, 1, level=5, experience=10,
+                  weapon_range=1)
+    add_character(game_state.monster_names["goblin"].character, "goblin", "arena", 3, 0, level=1, experience=5,
+                  weapon_range=3)
+    add_character(game_state.monster_names["troll"].character, "troll", "arena", 0, 3, level=8, experience=0,
+                  weapon_range=4, dead=True)
+    add_character(game_state.monster_names["bat"].character, "bat", "other", 0, 0, level=3, experience=0,
+                  weapon_range=9)
+    return game_state
+
+
+def add_board(game_state, board_id, width, height, walls, portals):
+    board = game_state.board_names[board_id]
+    board.width = width
+    board.height = height
+    for x in range(width):
+        for y in range(height):
+            tile = board.grid.add()
+            if (x, y) in walls:
+                tile.tile_type = board_pb2.Tile.TileType.IMPASSIBLE
+            elif (x, y) in portals:
+                tile.tile_type = board_pb2.Tile.TileType.PORTAL
+            else:
+                tile.tile_type = board_pb2.Tile.TileType.BLANK
+    for x, y in portals:
+        portal = board.portals.add()
+        portal.board_id = board_id
+        portal.x = x
+        portal.y = y
+
+
+def add_character(character, name, board_id, x, y, level, experience, weapon_range, splash_radius=0, dead=False):
+    character.name = name
+    character.level = level
+    character.experience = experience
+    character.base_max_health = 10
+    character.current_health = 0 if dead else 10
+    character.is_dead = dead
+    character.base_speed = 1
+    character.position.board_id = board_id
+    character.position.x = x
+    character.position.y = y
+    character.spawn_point.CopyFrom(character.position)
+    character.weapon.range = weapon_range
+    character.weapon.splash_radius = splash_radius
+
+
+def position(x, y, board_id="arena"):
+    return Position.create(x, y, board_id)
+
+
+def ok(response):
+    response.status.status = 200
+    return response
+
+
+def characters(response_field, game_state, names):
+    for name in names:
+        if name in game_state.player_names:
+            response_field.add().CopyFrom(game_state.player_names[name].character)
+        else:
+            response_field.add().CopyFrom(game_state.monster_names[name].character)
+
+
+def expected_responses(api, game_state):
+    """
+    Yields (endpoint, APIQuery, expected response) triples
+    """
+    arena = game_state.board_names["arena"]
+
+    response = ok(api_pb2.APILeaderBoardResponse())
+    # Total experience: rival 5 * 4 * 50 + 10 = 1010, hero 2 * 1 * 50 + 50 = 150
+    for name in ("rival", "hero"):
+        response.leaderBoard.add().CopyFrom(game_state.player_names[name])
+    yield "leaderBoard", api.get_leaderboard_query(), response
+
+    # Paths exclude the start and only their length and last tile are compared. Characters do not block.
+    response = ok(api_pb2.APIPathFindingResponse())
+    for x in range(1, 5):
+        response.path.add().CopyFrom(position(x, 0).build_proto_class())
+    yield "pathFinding", api.find_path_query(position(0, 0), position(4, 0)), response
+
+    response = ok(api_pb2.APIPathFindingResponse())
+    for x, y in ((1, 0), (2, 0), (3, 0), (4, 0), (4, 1), (4, 2)):
+        response.path.add().CopyFrom(position(x, y).build_proto_class())
+    yield "pathFinding", api.find_path_query(position(0, 0), position(4, 2)), response
+
+    # Ending on an impassable tile
+    yield "pathFinding", api.find_path_query(position(0, 0), position(2, 2)), ok(api_pb2.APIPathFindingResponse())
+
+    # Living characters on the board but the player, closest first: troll is dead, bat on another board
+    response = ok(api_pb2.APIFindEnemiesByDistanceResponse())
+    characters(response.enemies, game_state, ("rival", "goblin"))
+    yield "findEnemiesByDistance", api.find_enemies_by_distance_query(position(0, 0)), response
+
+    response = ok(api_pb2.APIFindEnemiesByDistanceResponse())
+    characters(response.enemies, game_state, ("goblin", "rival"))
+    yield "findEnemiesByDistance", api.find_enemies_by_distance_query(position(4, 4)), response
+
+    response = ok(api_pb2.APIFindMonstersByExpResponse())
+    response.monsters.add().CopyFrom(game_state.monster_names["goblin"])
+    yield "findMonstersByExp", api.find_monsters_by_exp_query(position(0, 0)), response
+
+    hat, weapon, consumable = arena.grid[0 * 5 + 1].items[0], arena.grid[1 * 5 + 3].items[0], \
+        arena.grid[4 * 5 + 1].items[0]
+    for item_range, found in ((2, [(hat, (0, 1))]),
+                              (5, [(hat, (0, 1)), (weapon, (1, 3)), (consumable, (4, 1))])):
+        response = ok(api_pb2.APIFindItemsInRangeByDistanceResponse())
+        for item, (x, y) in found:
+            response.items.add().CopyFrom(item)
+            response.positions.add().CopyFrom(position(x, y).build_proto_class())
+        yield "findItemsInRangeByDistance", api.find_items_in_range_by_distance_query(position(0, 0), item_range), \
+            response
+
+    # Within hero's weapon range (2) of the position
+    response = ok(api_pb2.APIFindEnemiesInRangeOfAttackByDistanceResponse())
+    characters(response.enemies, game_state, ("rival",))
+    yield "findEnemiesInRangeOfAttackByDistance", \
+        api.find_enemies_in_range_of_attack_by_distance_query(position(0, 0)), response
+
+    response = ok(api_pb2.APIFindEnemiesInRangeOfAttackByDistanceResponse())
+    characters(response.enemies, game_state, ("goblin", "rival"))
+    yield "findEnemiesInRangeOfAttackByDistance", \
+        api.find_enemies_in_range_of_attack_by_distance_query(position(3, 1)), response
+
+    # hero attacks from (0, 0) with range 2 and splash radius 1
+    response = ok(api_pb2.APIFindAllEnemiesHitResponse())
+    characters(response.enemies_hit, game_state, ("rival",))
+    yield "findAllEnemiesHit", api.find_all_enemies_hit_query(position(1, 1)), response
+
+    response = ok(api_pb2.APIFindAllEnemiesHitResponse())
+    characters(response.enemies_hit, game_state, ("rival",))
+    yield "findAllEnemiesHit", api.find_all_enemies_hit_query(position(0, 1)), response
+
+    # Out of hero's weapon range: no attack
+    yield "findAllEnemiesHit", api.find_all_enemies_hit_query(position(4, 0)), ok(api_pb2.APIFindAllEnemiesHitResponse())
+
+    # Within the weapon range of a living enemy: rival (1) at (1, 2), goblin (3, more than hero's 2) at (3, 3);
+    # at (0, 4) only the dead troll is in range
+    for x, y, in_range in ((1, 2, True), (3, 3, True), (0, 4, False)):
+        response = ok(api_pb2.APIInRangeOfAttackResponse())
+        response.inRangeOfAttack = in_range
+        yield "inRangeOfAttack", api.in_range_of_attack_query(position(x, y)), response
+
+    response = ok(api_pb2.APIFindClosestPortalResponse())
+    response.portal.CopyFrom(position(4, 4).build_proto_class())
+    yield "findClosestPortal", api.find_closest_portal_query(position(0, 0)), response
+
+    response = ok(api_pb2.APIFindClosestPortalResponse())
+    response.portal.CopyFrom(position(2, 2, "other").build_proto_class())
+    yield "findClosestPortal", api.find_closest_portal_query(position(0, 0, "other")), response
+
+    # An unknown board is an error
+    response = api_pb2.APIFindClosestPortalResponse()
+    response.status.status = 400
+    response.status.message = "Board does not exist"
+    yield "findClosestPortal", api.find_closest_portal_query(position(0, 0, "nowhere")), response
+
+
+def main():
+    game_state = build_game_state()
+    api = API(GameState(game_state), "hero", use_remote_queries=True)
+
+    shutil.rmtree(OUT_DIR, ignore_errors=True)
+    os.makedirs(OUT_DIR)
+    count = 0
+    for endpoint, query, response in expected_responses(api, game_state):
+        name = os.path.join(OUT_DIR, f"{count:05d}-{endpoint}")
+        with open(name + ".req", "wb") as f:
+            f.write(api.serialize(query.payload))
+        with open(name + ".resp", "wb") as f:
+            f.write(response.SerializeToString())
+        count += 1
+    print(f"Wrote {count} requests and expected responses to {OUT_DIR}")
+
+
+if __name__ == "__main__":
+    main()
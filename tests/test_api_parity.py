@@ -0,0 +1,14 @@
+import os
+
+import pytest
+
+from mech.mania.starter_pack.entrypoints import api_parity_check
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "api_parity")
+RECORDINGS = sorted(name for name in os.listdir(FIXTURES) if os.path.isdir(os.path.join(FIXTURES, name)))
+
+
+@pytest.mark.skipif(not RECORDINGS, reason="no responses recorded from the engine yet, see fixtures/api_parity")
+@pytest.mark.parametrize("recording", RECORDINGS or [None])
+def test_local_queries_match_recorded_engine_responses(recording):
+    assert api_parity_check.check(os.path.join(FIXTURES, recording))
@@ -0,0 +1,44 @@
+import pytest
+
+from mech.mania.engine.domain.model import api_pb2
+from mech.mania.engine.domain.model import game_pb2
+from mech.mania.starter_pack.benchmarks.game_state_generator import generate_game_state
+from mech.mania.starter_pack.domain.api import API, encode_game_state_field
+from mech.mania.starter_pack.domain.model.characters.position import Position
+from mech.mania.starter_pack.domain.model.game_state import GameState
+
+
+def game_state_with_name(length):
+    game_state = game_pb2.GameState()
+    if length > 0:
+        game_state.player_names["p" * length].character.name = ""
+    return game_state
+
+
+# Name lengths on both sides of where the varint length of the game state grows from one byte to two and three
+@pytest.mark.parametrize("lengths", [range(0, 1), range(100, 140), range(16350, 16400), range(100000, 100001)],
+                         ids=lambda lengths: f"{lengths.start}-{lengths.stop}")
+def test_matches_protobuf_encoding_of_the_game_state_field(lengths):
+    for length in lengths:
+        game_state = game_state_with_name(length)
+        request = api_pb2.APIPathFindingRequest()
+        request.gameState.CopyFrom(game_state)
+
+        assert encode_game_state_field(game_state.SerializeToString()) == request.SerializeToString()
+
+
+def test_serialized_requests_parse_back_with_the_game_state():
+    game_state = generate_game_state(boards=2, width=30, height=30)
+    api = API(GameState(game_state), "pvp_player0", use_remote_queries=True)
+    start, end = Position.create(1, 2, "pvp"), Position.create(3, 4, "pvp")
+
+    for query in (api.find_path_query(start, end), api.get_leaderboard_query(),
+                  api.find_items_in_range_by_distance_query(start, 5)):
+        request = type(query.payload)()
+        request.ParseFromString(api.serialize(query.payload))
+
+        assert request.gameState == game_state
+        expected = type(query.payload)()
+        expected.CopyFrom(query.payload)
+        expected.gameState.CopyFrom(game_state)
+        assert request == expected
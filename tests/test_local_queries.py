@@ -0,0 +1,11 @@
+import os
+
+from mech.mania.starter_pack.entrypoints import api_parity_check
+
+# Provisional, written by hand rather than recorded from the engine: see the README there
+HAND_WRITTEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "provisional_api_responses",
+                            "hand_written")
+
+
+def test_local_queries_keep_their_provisional_hand_written_answers():
+    assert api_parity_check.check(HAND_WRITTEN)
@@ -0,0 +1,119 @@
+import time
+
+import numpy as np
+import pytest
+
+from mech.mania.starter_pack.domain.memory.backends import FileBackend
+from mech.mania.starter_pack.domain.memory.memory_object import MemoryObject
+from mech.mania.starter_pack.domain.memory.set_value_result import SetValueResult
+
+BACKENDS = [("dict", MemoryObject.BLOB_STORAGE), ("dict", MemoryObject.HASH_STORAGE),
+            ("file", MemoryObject.BLOB_STORAGE), ("file", MemoryObject.HASH_STORAGE)]
+
+
+@pytest.fixture(params=BACKENDS, ids=lambda param: "-".join(param))
+def open_memory(request, tmp_path):
+    """
+    @return A function opening a MemoryObject on the backend and storage under test; every test gets keys of its own
+    """
+    backend, storage = request.param
+
+    def open_memory(player_name=None, storage=storage, **kwargs):
+        return MemoryObject(target_engine=tmp_path.name, team_name="team", player_name=player_name,
+                            storage=storage, backend=backend, directory=str(tmp_path), **kwargs)
+    return open_memory
+
+
+def test_values_are_read_back_by_another_object(open_memory):
+    memory = open_memory()
+    assert memory.set_value("turns", 3) == SetValueResult.OPERATION_SUCCESS
+    assert memory.set_value("last_action", "MOVE") == SetValueResult.OPERATION_SUCCESS
+    assert memory.set_value("visits", {"pvp": [1, 2]}) == SetValueResult.OPERATION_SUCCESS
+    assert memory.set_value("heat", np.arange(6.0).reshape(2, 3)) == SetValueResult.OPERATION_SUCCESS
+    assert memory.set_value("gone", True) == SetValueResult.OPERATION_SUCCESS
+    assert memory.remove_key("gone")
+    assert memory.set_value("bad", {(1, 2): 3}) == SetValueResult.INVALID_OBJECT_TYPE
+    assert memory.save_and_close()
+
+    reopened = open_memory()
+    assert reopened.get_value("turns", int) == (3, True)
+    assert reopened.get_value("last_action", str) == ("MOVE", True)
+    assert reopened.get_value("visits", dict) == ({"pvp": [1, 2]}, True)
+    heat, found = reopened.get_value("heat", np.ndarray)
+    assert found and np.array_equal(heat, np.arange(6.0).reshape(2, 3))
+    assert reopened.get_value("gone", bool) == (False, False)
+    assert reopened.get_value("bad", dict) == ({}, False)
+    assert reopened.get_value("turns", str) == (3, False)
+
+
+def test_write_behind_saves_at_the_end_of_the_turn(open_memory):
+    memory = open_memory(flush_interval=60)
+    memory.set_value("turns", 1)
+    assert open_memory().get_value("turns", int) == (0, False)
+
+    # Saved by the flusher thread, well before the interval
+    memory.end_turn()
+    deadline = time.monotonic() + 5
+    while open_memory().get_value("turns", int) != (1, True):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    memory.save_and_close()
+
+
+def test_writes_after_close_are_saved(open_memory):
+    memory = open_memory(flush_interval=60)
+    memory.set_value("turns", 1)
+    assert memory.save_and_close()
+
+    # A turn still in progress when the player was closed
+    memory.set_value("turns", 2)
+    assert open_memory().get_value("turns", int) == (2, True)
+
+
+def test_data_saved_before_keys_were_per_player_moves_to_the_first_player(open_memory):
+    shared = open_memory()
+    shared.set_value("turns", 5)
+    shared.save_and_close()
+
+    player = open_memory("Player One")
+    assert player.get_value("turns", int) == (5, True)
+    player.set_value("wins", 1)
+    player.save_and_close()
+
+    assert open_memory("other").get_value("turns", int) == (0, False)
+    assert open_memory().get_value("turns", int) == (0, False)
+    reopened = open_memory("Player One")
+    assert reopened.get_value("turns", int) == (5, True)
+    assert reopened.get_value("wins", int) == (1, True)
+
+
+def test_blob_data_is_migrated_to_hash_storage(open_memory):
+    blob = open_memory(storage=MemoryObject.BLOB_STORAGE)
+    blob.set_value("turns", 7)
+    blob.set_value("costs", [1.5, 2.5])
+    blob.save_and_close()
+
+    hashed = open_memory(storage=MemoryObject.HASH_STORAGE)
+    assert hashed.get_value("turns", int) == (7, True)
+    hashed.set_value("turns", 8)
+    hashed.save_and_close()
+
+    reopened = open_memory(storage=MemoryObject.HASH_STORAGE)
+    assert reopened.get_value("turns", int) == (8, True)
+    assert reopened.get_value("costs", list) == ([1.5, 2.5], True)
+
+
+def test_file_backend_reads_fields_replaced_by_another_process(tmp_path):
+    reader = FileBackend("key", str(tmp_path))
+    writer = FileBackend("key", str(tmp_path))
+    assert reader.read_field("x") is None
+
+    writer.write_fields({"x": b"1"}, [])
+    assert bytes(reader.read_field("x")) == b"1"
+
+    writer.write_fields({"x": b"22", "y": b"3"}, [])
+    assert bytes(reader.read_field("x")) == b"22"
+
+    # Not writing back the fields it read before
+    reader.write_fields({"z": b"4"}, [])
+    assert sorted(writer.get_fields()) == ["x", "y", "z"]
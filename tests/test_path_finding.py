@@ -0,0 +1,126 @@
+import random
+import threading
+from collections import deque
+
+import pytest
+
+from mech.mania.engine.domain.model import board_pb2
+from mech.mania.starter_pack.benchmarks.game_state_generator import generate_game_state
+from mech.mania.starter_pack.domain.model.board.board import Board
+from mech.mania.starter_pack.domain.model.characters.position import Position
+from mech.mania.starter_pack.domain.path_finding import PathFinder
+
+WALKABLE = (board_pb2.Tile.TileType.BLANK, board_pb2.Tile.TileType.PORTAL)
+# (seed, width, height, impassable_density)
+BOARDS = [(1, 12, 12, 0.0), (2, 15, 9, 0.2), (3, 20, 20, 0.35), (4, 7, 30, 0.45), (5, 1, 10, 0.1)]
+
+
+def build_board(seed, width, height, impassable_density):
+    game_state = generate_game_state(seed=seed, width=width, height=height, impassable_density=impassable_density,
+                                     portals=3, players_per_board=0, monsters_per_board=0, items_per_tile=0)
+    return Board(game_state.board_names["pvp"])
+
+
+def is_walkable(board, x, y):
+    return 0 <= x < board.width and 0 <= y < board.height and \
+        board.proto_board.grid[x * board.height + y].tile_type in WALKABLE
+
+
+def brute_force_distances(board, x, y):
+    """
+    @return {(x, y): walking distance from (x, y)} for every tile reachable from it
+    """
+    distances = {(x, y): 0}
+    queue = deque([(x, y)])
+    while queue:
+        current = queue.popleft()
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            neighbor = (current[0] + dx, current[1] + dy)
+            if neighbor not in distances and is_walkable(board, *neighbor):
+                distances[neighbor] = distances[current] + 1
+                queue.append(neighbor)
+    return distances
+
+
+def assert_walkable_path(board, start, path):
+    previous = (start.x, start.y)
+    for pos in path:
+        assert pos.board_id == start.board_id
+        assert is_walkable(board, pos.x, pos.y)
+        assert abs(pos.x - previous[0]) + abs(pos.y - previous[1]) == 1
+        previous = (pos.x, pos.y)
+
+
+@pytest.mark.parametrize("seed, width, height, impassable_density", BOARDS)
+def test_paths_are_as_short_as_brute_force_bfs(seed, width, height, impassable_density):
+    board = build_board(seed, width, height, impassable_density)
+    finder = PathFinder(board)
+    walkable = [(x, y) for x in range(width) for y in range(height) if is_walkable(board, x, y)]
+    rnd = random.Random(seed)
+
+    for _ in range(100):
+        start = Position.create(*rnd.choice(walkable), "pvp")
+        end = Position.create(rnd.randrange(width), rnd.randrange(height), "pvp")
+        path = finder.find_path(start, end)
+
+        distance = brute_force_distances(board, start.x, start.y).get((end.x, end.y))
+        if distance is None:
+            assert path == []
+        else:
+            assert len(path) == distance
+            assert_walkable_path(board, start, path)
+            if path:
+                assert (path[-1].x, path[-1].y) == (end.x, end.y)
+
+
+@pytest.mark.parametrize("seed, width, height, impassable_density", BOARDS)
+def test_paths_to_another_board_lead_to_the_closest_portal(seed, width, height, impassable_density):
+    board = build_board(seed, width, height, impassable_density)
+    finder = PathFinder(board)
+    portals = {(portal.x, portal.y) for portal in board.proto_board.portals}
+
+    for x in range(width):
+        for y in range(height):
+            if not is_walkable(board, x, y):
+                continue
+            start = Position.create(x, y, "pvp")
+            path = finder.find_path(start, Position.create(0, 0, "elsewhere"))
+
+            reachable = brute_force_distances(board, x, y)
+            portal_distances = [reachable[portal] for portal in portals if portal in reachable]
+            if not portal_distances:
+                assert path == []
+                continue
+            assert len(path) == min(portal_distances)
+            assert_walkable_path(board, start, path)
+            end = (path[-1].x, path[-1].y) if path else (x, y)
+            assert end in portals
+
+
+def test_no_path_to_an_impassable_tile_or_from_outside_the_board():
+    board = build_board(6, 10, 10, 0.3)
+    finder = PathFinder(board)
+    blocked = next((x, y) for x in range(10) for y in range(10) if not is_walkable(board, x, y))
+    walkable = next((x, y) for x in range(10) for y in range(10) if is_walkable(board, x, y))
+
+    assert finder.find_path(Position.create(*walkable, "pvp"), Position.create(*blocked, "pvp")) == []
+    assert finder.find_path(Position.create(-1, 0, "pvp"), Position.create(*walkable, "pvp")) == []
+    assert finder.find_path(Position.create(*walkable, "pvp"), Position.create(*walkable, "pvp")) == []
+
+
+def test_terrain_tables_are_built_once_for_concurrent_threads():
+    terrain = build_board(7, 30, 30, 0.2).get_terrain()
+    barrier = threading.Barrier(8)
+    results = []
+
+    def build():
+        barrier.wait()
+        results.append((terrain.get_portal_tables(), terrain.get_all_pairs_distances()))
+
+    threads = [threading.Thread(target=build) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(portal_tables is results[0][0] and all_pairs is results[0][1] for portal_tables, all_pairs in results)
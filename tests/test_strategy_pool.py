@@ -0,0 +1,120 @@
+import threading
+
+from mech.mania.starter_pack.entrypoints.strategy_pool import StrategyPool
+
+
+class FakeMemory:
+    def __init__(self):
+        self.turns_ended = 0
+        self.flushes = 0
+        self.closed = False
+
+    def end_turn(self):
+        self.turns_ended += 1
+
+    def flush(self):
+        self.flushes += 1
+
+    def save_and_close(self):
+        self.closed = True
+        return True
+
+
+class FakeStrategy:
+    def __init__(self, player_name):
+        self.player_name = player_name
+        self.memory = FakeMemory()
+
+
+def play_turn(pool, player_name):
+    player = pool.acquire(player_name)
+    pool.release(player)
+    return player
+
+
+def test_creates_one_strategy_per_player():
+    pool = StrategyPool(FakeStrategy)
+
+    first = play_turn(pool, "a")
+    assert play_turn(pool, "a").strategy is first.strategy
+    assert play_turn(pool, "b").strategy is not first.strategy
+    assert first.strategy.player_name == "a"
+    assert first.strategy.memory.turns_ended == 2
+
+
+def test_evicts_least_recently_used_players_beyond_max_players():
+    pool = StrategyPool(FakeStrategy, max_players=2, idle_timeout=None)
+    a, b = play_turn(pool, "a"), play_turn(pool, "b")
+    play_turn(pool, "a")
+
+    c = play_turn(pool, "c")
+
+    assert pool.get_player_names() == ["a", "c"]
+    assert b.strategy.memory.closed
+    assert not a.strategy.memory.closed and not c.strategy.memory.closed
+
+
+def test_never_evicts_players_with_a_turn_in_progress():
+    pool = StrategyPool(FakeStrategy, max_players=1, idle_timeout=None)
+    busy = pool.acquire("busy")
+
+    other = play_turn(pool, "other")
+    assert pool.get_player_names() == ["busy", "other"]
+    assert not busy.strategy.memory.closed
+
+    pool.release(busy)
+    play_turn(pool, "other")
+    assert pool.get_player_names() == ["other"]
+    assert busy.strategy.memory.closed
+    assert not other.strategy.memory.closed
+
+
+def test_evicts_idle_players_after_idle_timeout():
+    pool = StrategyPool(FakeStrategy, idle_timeout=60)
+    idle = play_turn(pool, "idle")
+    play_turn(pool, "active")
+
+    idle.last_used -= 61
+    play_turn(pool, "active")
+
+    assert pool.get_player_names() == ["active"]
+    assert idle.strategy.memory.closed
+
+
+def test_a_player_created_concurrently_is_created_once():
+    created = []
+    barrier = threading.Barrier(8)
+
+    def create_strategy(player_name):
+        created.append(FakeStrategy(player_name))
+        return created[-1]
+
+    pool = StrategyPool(create_strategy)
+    players = []
+
+    def run():
+        barrier.wait()
+        players.append(play_turn(pool, "a"))
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    kept = players[0].strategy
+    assert all(player.strategy is kept for player in players)
+    # Strategies built by the threads that lost the race are closed right away
+    assert all(strategy.memory.closed for strategy in created if strategy is not kept)
+    assert not kept.memory.closed
+
+
+def test_flush_all_and_close_all_reach_every_player():
+    pool = StrategyPool(FakeStrategy)
+    players = [play_turn(pool, name) for name in ("a", "b", "c")]
+
+    pool.flush_all()
+    assert all(player.strategy.memory.flushes == 1 and not player.strategy.memory.closed for player in players)
+
+    pool.close_all()
+    assert all(player.strategy.memory.closed for player in players)
@@ -0,0 +1,104 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+
+from mech.mania.starter_pack.domain.model.characters.character_decision import CharacterDecision
+from mech.mania.starter_pack.entrypoints.async_game_server import AsyncGameServer
+from mech.mania.starter_pack.entrypoints.game_server import GameServer
+from mech.mania.starter_pack.entrypoints.strategy_pool import StrategyPool
+
+TURN_BUDGET = 0.2
+# Player "slow" takes five turn budgets to decide, the others decide right away
+SLOW_DECISION = 1.0
+FALLBACK = CharacterDecision("MOVE", None)
+
+
+class FakeStrategy:
+    def __init__(self, player_name):
+        self.delay = SLOW_DECISION if player_name == "slow" else 0
+        # The game states make_decision was called with
+        self.decided = []
+
+    def fallback_decision(self, player_name, game_state):
+        return FALLBACK
+
+    def make_decision(self, player_name, game_state):
+        self.decided.append(game_state)
+        time.sleep(self.delay)
+        return CharacterDecision("MOVE", None)
+
+    async def make_decision_async(self, player_name, game_state):
+        self.decided.append(game_state)
+        await asyncio.sleep(self.delay)
+        return CharacterDecision("MOVE", None)
+
+
+def create_game_server(threads=1):
+    # Not started: only the decision path is used
+    server = GameServer.__new__(GameServer)
+    server.strategies = StrategyPool(FakeStrategy)
+    server.turn_budget = TURN_BUDGET
+    server.decision_executor = concurrent.futures.ThreadPoolExecutor(max_workers=threads + GameServer.DECISION_THREADS)
+    return server
+
+
+def create_async_game_server():
+    server = AsyncGameServer.__new__(AsyncGameServer)
+    server.strategies = StrategyPool(FakeStrategy)
+    server.turn_budget = TURN_BUDGET
+    server.logger = logging.getLogger("test_turn_deadline")
+    return server
+
+
+def test_a_slow_player_does_not_starve_the_others():
+    server = create_game_server()
+    logger = logging.getLogger("test_turn_deadline")
+
+    def play_turn(player_name, turn):
+        player = server.strategies.acquire(player_name)
+        return server.decide_before_deadline(player, turn, logger, time.monotonic() + TURN_BUDGET)
+
+    # More turns of the slow player at once than there are decision threads, as when the engine sends the next
+    # turns while the first one is still being decided
+    slow_decisions = []
+    threads = [threading.Thread(target=lambda turn=turn: slow_decisions.append(play_turn("slow", turn)))
+               for turn in range(2 * (1 + GameServer.DECISION_THREADS))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(decision is FALLBACK for decision in slow_decisions)
+
+    for turn in range(3):
+        decision = play_turn("fast", turn)
+        assert isinstance(decision, CharacterDecision) and decision is not FALLBACK
+
+    # The turns that could not start in time were dropped instead of deciding later on their old game state
+    time.sleep(SLOW_DECISION + TURN_BUDGET)
+    slow = server.strategies.acquire("slow")
+    assert len(slow.strategy.decided) == 1
+    server.strategies.release(slow)
+    server.decision_executor.shutdown()
+
+
+def test_a_slow_player_does_not_decide_late_turns_on_the_event_loop():
+    server = create_async_game_server()
+
+    async def play_turn(player_name, turn):
+        player = server.strategies.acquire(player_name)
+        return await server.decide_before_deadline(player, turn, time.monotonic() + TURN_BUDGET)
+
+    async def play():
+        slow_decisions = await asyncio.gather(*(play_turn("slow", turn) for turn in range(8)))
+        assert all(decision is FALLBACK for decision in slow_decisions)
+
+        decision = await play_turn("fast", 0)
+        assert isinstance(decision, CharacterDecision) and decision is not FALLBACK
+
+        await asyncio.sleep(SLOW_DECISION + TURN_BUDGET)
+
+    asyncio.run(play())
+    slow = server.strategies.acquire("slow")
+    assert slow.strategy.decided == [0]
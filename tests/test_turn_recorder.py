@@ -0,0 +1,42 @@
+import multiprocessing
+import os
+
+import pytest
+
+from mech.mania.starter_pack.entrypoints.turn_recorder import TurnRecorder, read_turns
+
+
+def record_turns(recorder, name, count):
+    for i in range(count):
+        recorder.record(f"{name} turn {i}".encode(), f"{name} decision {i}".encode())
+    recorder.close()
+
+
+def test_records_are_read_back(tmp_path):
+    path = str(tmp_path / "turns.log")
+    recorder = TurnRecorder(path)
+    record_turns(recorder, "main", 3)
+    recorder.record(b"after close", b"")
+
+    assert list(read_turns(path)) == [(f"main turn {i}".encode(), f"main decision {i}".encode()) for i in range(3)]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="forking workers needs os.fork")
+def test_forked_workers_write_their_own_log(tmp_path):
+    path = str(tmp_path / "turns.log")
+    recorder = TurnRecorder(path)
+    recorder.record(b"before fork", b"decision")
+
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=record_turns, args=(recorder, f"worker{i}", 200)) for i in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+    recorder.close()
+
+    assert list(read_turns(path)) == [(b"before fork", b"decision")]
+    for i, worker in enumerate(workers):
+        assert list(read_turns(f"{path}.{worker.pid}")) == \
+            [(f"worker{i} turn {j}".encode(), f"worker{i} decision {j}".encode()) for j in range(200)]
@@ -0,0 +1,65 @@
+import json
+
+import numpy as np
+import pytest
+
+from mech.mania.starter_pack.domain.memory.value_encoding import decode_value, encode_value, is_encodable
+
+VALUES = [
+    True, False, 0, -5, 2 ** 63 - 1, -2 ** 63, 2 ** 63, -2 ** 70, 1.5, -0.0, float("inf"), "", "héllo",
+    [], [1, 2, -300], [1, 2 ** 40], [2 ** 63 - 1, -2 ** 63], [2 ** 64, 1], [1.5, 2.0], [1, 2.0], [True, 1],
+    [1, "a", [2.0, True]], {}, {"pvp": {3: 4, "x": [True]}, 1.5: "f", False: []},
+]
+
+ARRAYS = [
+    np.arange(12, dtype=np.int32).reshape(3, 4), np.zeros((2, 0)), np.array([True, False]), np.array(7.5),
+    np.arange(10, dtype=np.uint16)[::3], np.asfortranarray(np.random.default_rng(0).random((3, 5))),
+    np.arange(4, dtype=">i4"),
+]
+
+
+@pytest.mark.parametrize("value", VALUES, ids=repr)
+def test_values_round_trip_with_their_type(value):
+    decoded = decode_value(encode_value(value))
+
+    assert decoded == value
+    assert repr(decoded) == repr(value)
+
+
+@pytest.mark.parametrize("array", ARRAYS, ids=lambda array: f"{array.dtype.str}{array.shape}")
+def test_arrays_round_trip_as_writable_copies(array):
+    decoded = decode_value(encode_value(array))
+
+    assert type(decoded) is np.ndarray
+    assert decoded.dtype == array.dtype
+    assert decoded.shape == array.shape
+    assert np.array_equal(decoded, array)
+    assert decoded.flags.writeable
+
+
+def test_nan_round_trips():
+    assert np.isnan(decode_value(encode_value(float("nan"))))
+
+
+def test_decodes_from_a_memoryview():
+    value = {"heat": np.ones((2, 2)), "visits": [1, 2, 3]}
+    decoded = decode_value(memoryview(encode_value(value)))
+
+    assert np.array_equal(decoded["heat"], value["heat"])
+    assert decoded["visits"] == [1, 2, 3]
+
+
+@pytest.mark.parametrize("value", [{"a": 1, "b": [1.5, "x"]}, "s", 3, [True, None]], ids=repr)
+def test_reads_json_written_before(value):
+    assert decode_value(json.dumps(value).encode("utf-8")) == value
+
+
+@pytest.mark.parametrize("value", [None, (1, 2), {(1, 2): 3}, [object()], np.array([object()]),
+                                   np.array(["a"]), {1: None}], ids=repr)
+def test_rejects_values_it_cannot_encode(value):
+    assert not is_encodable(value)
+
+
+@pytest.mark.parametrize("value", VALUES + ARRAYS, ids=lambda value: type(value).__name__)
+def test_accepts_values_it_can_encode(value):
+    assert is_encodable(value)